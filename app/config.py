@@ -17,3 +17,79 @@ BATCH_SIZE = 100
 
 # File types
 ALLOWED_EXTENSIONS = {".pdf", ".doc", ".docx"}
+
+# Archive ingestion (zip/tar bundles streamed straight from memory)
+ARCHIVE_EXTENSIONS = {".zip", ".tar", ".tar.gz", ".tgz"}
+ARCHIVE_READ_CHUNK_SIZE = 1024 * 1024  # 1MB
+ARCHIVE_MAX_MEMBER_SIZE = int(os.getenv("ARCHIVE_MAX_MEMBER_SIZE", 50 * 1024 * 1024))  # 50MB
+ARCHIVE_MAX_TOTAL_SIZE = int(os.getenv("ARCHIVE_MAX_TOTAL_SIZE", 2 * 1024 * 1024 * 1024))  # 2GB
+ARCHIVE_MAX_MEMBERS = int(os.getenv("ARCHIVE_MAX_MEMBERS", 100000))
+ARCHIVE_MAX_COMPRESSION_RATIO = float(os.getenv("ARCHIVE_MAX_COMPRESSION_RATIO", 100))
+
+# Chunked GUI uploads (written straight into CV_DIR by the upload server)
+UPLOAD_SERVER_PORT = int(os.getenv("UPLOAD_SERVER_PORT", 8502))
+UPLOAD_PUBLIC_URL = os.getenv("UPLOAD_PUBLIC_URL")  # Defaults to the GUI host on UPLOAD_SERVER_PORT
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 5 * 1024 * 1024))  # 5MB
+UPLOAD_MAX_PARALLEL = int(os.getenv("UPLOAD_MAX_PARALLEL", 3))
+UPLOAD_MAX_FILE_SIZE = int(os.getenv("UPLOAD_MAX_FILE_SIZE", 2 * 1024 * 1024 * 1024))  # 2GB
+
+# Directory scanning (recursive, filtered, optionally sharded across processors)
+SCAN_MIN_SIZE = int(os.getenv("SCAN_MIN_SIZE", 0))
+SCAN_MAX_SIZE = int(os.getenv("SCAN_MAX_SIZE")) if os.getenv("SCAN_MAX_SIZE") else None
+SCAN_MODIFIED_AFTER = float(os.getenv("SCAN_MODIFIED_AFTER")) if os.getenv("SCAN_MODIFIED_AFTER") else None  # Unix timestamp
+PROCESSOR_SHARD_INDEX = int(os.getenv("PROCESSOR_SHARD_INDEX", 0))
+PROCESSOR_SHARD_COUNT = int(os.getenv("PROCESSOR_SHARD_COUNT", 1))
+
+# Multi-tenancy: one Weaviate tenant per hiring campaign / requisition
+MULTI_TENANCY = os.getenv("CV_MULTI_TENANCY", "false").lower() == "true"
+DEFAULT_TENANT = os.getenv("CV_TENANT", "default")
+
+# Weaviate HTTP client (one pooled keep-alive session per process)
+WEAVIATE_CONNECT_TIMEOUT = float(os.getenv("WEAVIATE_CONNECT_TIMEOUT", 5))
+WEAVIATE_READ_TIMEOUT = float(os.getenv("WEAVIATE_READ_TIMEOUT", 60))
+WEAVIATE_POOL_SIZE = int(os.getenv("WEAVIATE_POOL_SIZE", 20))
+
+# Startup: Weaviate and the transformer service are probed with exponential backoff until ready
+WEAVIATE_STARTUP_PERIOD = float(os.getenv("WEAVIATE_STARTUP_PERIOD", 60))  # Seconds before giving up
+STARTUP_BACKOFF_INITIAL = float(os.getenv("STARTUP_BACKOFF_INITIAL", 0.25))
+STARTUP_BACKOFF_MAX = float(os.getenv("STARTUP_BACKOFF_MAX", 5))
+TRANSFORMERS_INFERENCE_API = os.getenv("TRANSFORMERS_INFERENCE_API")  # Only probed when set
+STARTUP_WARM_UP = os.getenv("STARTUP_WARM_UP", "true").lower() == "true"
+
+# Dashboard queries run side by side on QUERY_POOL_SIZE workers per session, each bounded by QUERY_TIMEOUT seconds
+QUERY_POOL_SIZE = int(os.getenv("QUERY_POOL_SIZE", 4))
+QUERY_TIMEOUT = float(os.getenv("QUERY_TIMEOUT", 10))
+
+# Local index files (near-duplicate index, caches, aggregates)
+INDEX_DIR = os.path.join(DATA_DIR, "index")
+os.makedirs(INDEX_DIR, exist_ok=True)
+
+# Near-duplicate detection at ingest: "skip" drops near-duplicates, "link" stores them
+# pointing at their canonical CV, "off" disables the check
+DEDUP_MODE = os.getenv("DEDUP_MODE", "link")
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.85))
+DEDUP_NUM_PERM = 128
+DEDUP_SHINGLE_SIZE = 3  # Words per shingle
+
+# Skill analytics aggregates: bulk ingestion writes them once every AGGREGATES_FLUSH_EVERY CVs
+AGGREGATES_FLUSH_EVERY = int(os.getenv("AGGREGATES_FLUSH_EVERY", 500))
+
+# Process-wide LRU cache for skill search results
+SEARCH_CACHE_MAX_BYTES = int(os.getenv("SEARCH_CACHE_MAX_BYTES", 64 * 1024 * 1024))  # 64MB
+
+# Candidate ranking: every CV is scanned with the cursor API in pages of RANKING_SCAN_PAGE_SIZE,
+# and query distances of the matches are fetched RANKING_DISTANCE_BATCH_SIZE ids at a time
+RANKING_SCAN_PAGE_SIZE = int(os.getenv("RANKING_SCAN_PAGE_SIZE", 1000))
+RANKING_DISTANCE_BATCH_SIZE = int(os.getenv("RANKING_DISTANCE_BATCH_SIZE", 200))
+RESULTS_PAGE_SIZE = int(os.getenv("RESULTS_PAGE_SIZE", 10))
+
+# Index snapshots (columnar export / bulk restore)
+SNAPSHOT_DIR = os.path.join(DATA_DIR, "snapshots")
+SNAPSHOT_PAGE_SIZE = int(os.getenv("SNAPSHOT_PAGE_SIZE", 500))
+SNAPSHOT_BATCH_SIZE = int(os.getenv("SNAPSHOT_BATCH_SIZE", 200))
+SNAPSHOT_IMPORT_WORKERS = int(os.getenv("SNAPSHOT_IMPORT_WORKERS", 4))
+
+# Re-indexing: "rebuild" ingests into a fresh versioned index and switches readers over
+# once its count is verified, "replace" clears the live index first (sharded runs always replace)
+PROCESSOR_MODE = os.getenv("PROCESSOR_MODE", "rebuild")
+REBUILD_GC_GRACE = float(os.getenv("REBUILD_GC_GRACE", 5))  # Seconds before the old index is dropped
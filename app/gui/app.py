@@ -3,10 +3,9 @@ import warnings
 warnings.filterwarnings('ignore', category=DeprecationWarning)
 
 import streamlit as st
-import weaviate
 import os
 import plotly.graph_objects as go
-from typing import List, Dict
+from typing import List, Dict, Optional
 import base64
 import sys
 import glob
@@ -14,6 +13,9 @@ from pathlib import Path
 import re
 import logging
 import time
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 
 # Configure logging
 logging.basicConfig(
@@ -25,13 +27,21 @@ logger = logging.getLogger('CV_GUI')
 # Add parent directory to Python path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 import config
-from processor.processor import CVProcessor
+from processor.aggregates import recompute_aggregates
+from processor.archive import read_archive_member, split_archive_path
+from processor.cache import search_cache
+from processor.processor import CVProcessor, get_client, is_valid_partition, list_requisitions
+from processor.ranking import CandidateRanker
+from processor.rebuild import rebuild_index
+from processor.startup import get_startup_timings
+
+# The folder upload component ships as a standalone package next to the GUI
+sys.path.append(os.path.join(os.path.dirname(__file__), "components", "streamlit_folder_upload"))
+from streamlit_folder_upload import folder_uploader
 
 logger.info(f"Data directory: {config.DATA_DIR}")
 logger.info(f"CV directory: {config.CV_DIR}")
 logger.info(f"CV directory exists: {os.path.exists(config.CV_DIR)}")
-if os.path.exists(config.CV_DIR):
-    logger.info(f"CV directory contents: {os.listdir(config.CV_DIR)}")
 
 # Define tech skills dictionary with colors
 TECH_SKILLS = {
@@ -58,13 +68,12 @@ TECH_SKILLS = {
 }
 
 class CVAnalyzer:
-    def __init__(self, weaviate_url: str = None):
-        """Initialize CVAnalyzer with Weaviate client"""
+    def __init__(self, weaviate_url: str = None, tenant: str = None):
+        """Initialize CVAnalyzer with Weaviate client, scoped to one partition when multi-tenancy is on"""
         try:
-            self.client = weaviate.Client(weaviate_url or config.WEAVIATE_URL)
+            # Waits, with backoff, until Weaviate is ready or WEAVIATE_STARTUP_PERIOD runs out
+            self.client = get_client(weaviate_url)
             logger.info(f"Connected to Weaviate at {weaviate_url or config.WEAVIATE_URL}")
-            # Test connection
-            self.client.schema.get()
         except Exception as e:
             logger.error(f"Failed to connect to Weaviate: {str(e)}")
             st.error(f"""
@@ -79,32 +88,51 @@ class CVAnalyzer:
             """)
             st.stop()
             
-        self.processor = CVProcessor(weaviate_url=config.WEAVIATE_URL)
+        self.processor = CVProcessor(weaviate_url=config.WEAVIATE_URL, tenant=tenant)
+        self.tenant = self.processor.partition
+        self.ranker = CandidateRanker(self.processor)
         self.tech_skills = list(TECH_SKILLS.keys())
+        self._aggregates_lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        # Progress of the last background re-index, shared by every session on this requisition
+        self.rebuild_status: Dict = {}
+        # Set when the requisition may be offloaded, so the next view checks it is loaded
+        self.needs_activation = True
+
+    def _get(self, properties: List[str]):
+        """Start a Get query on the CV index currently serving the partition"""
+        return self.processor.query_get(properties)
 
     def find_candidates_by_skills(self, skills: List[str], limit: int = 10):
-        """Find candidates that have any of the selected skills"""
-        try:
-            if not skills:
-                return []
+        """Find candidates that have any of the selected skills, served from the search cache when possible"""
+        if not skills:
+            return []
+
+        # Selection order doesn't change the result, so the key uses the sorted skill set
+        key = ("skills", self.processor.class_name, self.processor.tenant, tuple(sorted(set(skills))), limit)
+        cached = search_cache.get(key)
+        if cached is not None:
+            return list(cached)
 
+        token = search_cache.token()
+        candidates = self._search_candidates(skills, limit)
+        if candidates is not None:
+            search_cache.put(key, candidates, token)
+        return list(candidates or [])
+
+    def _search_candidates(self, skills: List[str], limit: int) -> Optional[List[Dict]]:
+        """Query Weaviate for candidates with any of the skills; None when the query failed"""
+        try:
             logger.info(f"Searching for candidates with skills: {skills}")
 
-            # Get all objects to verify data
-            all_objects = (
-                self.client.query
-                .get("CV", ["content", "skills", "filename"])
-                .do()
-            )
-            
-            if all_objects and 'data' in all_objects and 'Get' in all_objects['data'] and 'CV' in all_objects['data']['Get']:
-                all_cvs = all_objects['data']['Get']['CV']
-                logger.info(f"Total CVs in database: {len(all_cvs)}")
-                for cv in all_cvs:
-                    logger.info(f"CV {cv['filename']} has skills: {cv.get('skills', [])}")
-            else:
-                logger.warning("No CVs found in database!")
-                return []
+            # Dumping every stored CV costs a full extra query, so only do it when debugging
+            if logger.isEnabledFor(logging.DEBUG):
+                all_objects = (
+                    self._get(["skills", "filename"])
+                    .do()
+                )
+                for cv in self.processor.get_objects(all_objects):
+                    logger.debug(f"CV {cv['filename']} has skills: {cv.get('skills', [])}")
 
             # First try exact skill matches
             where_filter = {
@@ -115,16 +143,14 @@ class CVAnalyzer:
 
             # Query Weaviate with the filter
             results = (
-                self.client.query
-                .get("CV", ["content", "skills", "filename"])
+                self._get(["content", "skills", "filename", "duplicateOf", "_additional { id }"])
                 .with_where(where_filter)
                 .with_limit(limit)
                 .do()
             )
             
-            candidates = []
-            if results and 'data' in results and 'Get' in results['data'] and 'CV' in results['data']['Get']:
-                candidates = results['data']['Get']['CV']
+            candidates = self.processor.get_objects(results)
+            if candidates:
                 logger.info(f"Found {len(candidates)} candidates by exact skills")
                 for candidate in candidates:
                     logger.info(f"Candidate {candidate['filename']} matched by exact skills")
@@ -145,15 +171,14 @@ class CVAnalyzer:
                 }
 
                 results = (
-                    self.client.query
-                    .get("CV", ["content", "skills", "filename"])
+                    self._get(["content", "skills", "filename", "duplicateOf", "_additional { id }"])
                     .with_where(content_filter)
                     .with_limit(limit)
                     .do()
                 )
 
-                if results and 'data' in results and 'Get' in results['data'] and 'CV' in results['data']['Get']:
-                    candidates = results['data']['Get']['CV']
+                candidates = self.processor.get_objects(results)
+                if candidates:
                     logger.info(f"Found {len(candidates)} candidates by fuzzy search")
                     for candidate in candidates:
                         logger.info(f"Candidate {candidate['filename']} matched by fuzzy search")
@@ -173,28 +198,66 @@ class CVAnalyzer:
 
             # Sort by number of matching skills
             candidates.sort(key=lambda x: x['matching_count'], reverse=True)
-            
-            return candidates
+
+            # Show each near-duplicate group (a canonical CV and the copies linked
+            # to it at ingest) once, as its best match among the results
+            seen = set()
+            collapsed = []
+            for candidate in candidates:
+                group = candidate.get('duplicateOf') or candidate['_additional']['id']
+                if group not in seen:
+                    seen.add(group)
+                    collapsed.append(candidate)
+            return collapsed
             
         except Exception as e:
             logger.error(f"Failed to find candidates for skills {skills}: {str(e)}")
-            return []
+            return None
+
+    def _aggregates(self):
+        """Aggregates of the serving index, backfilled from a scan the first time an index lacks them"""
+        with self._aggregates_lock:
+            aggregates = self.processor.aggregates
+            if not aggregates.exists():
+                recompute_aggregates(self.processor)
+            return aggregates
 
     def get_skill_distribution(self):
-        """Get distribution of skills across all CVs"""
+        """Get distribution of skills across all CVs from the precomputed aggregates"""
+        try:
+            return self._aggregates().skill_counts()
+        except Exception as e:
+            logger.error(f"Failed to read skill aggregates, scanning CVs instead: {str(e)}")
+            return self._scan_skill_distribution()
+
+    def get_skill_analytics(self) -> Dict:
+        """Skill co-occurrence and daily ingest trend from the precomputed aggregates"""
+        try:
+            aggregates = self._aggregates()
+            skills, cooccurrence = aggregates.cooccurrence_matrix()
+            dates, totals, per_skill = aggregates.ingest_trend()
+            return {
+                'skills': skills,
+                'cooccurrence': cooccurrence,
+                'dates': dates,
+                'totals': totals,
+                'per_skill': per_skill
+            }
+        except Exception as e:
+            logger.error(f"Failed to read skill analytics: {str(e)}")
+            return {}
+
+    def _scan_skill_distribution(self):
+        """Get distribution of skills by scanning the skills of every CV"""
         try:
             results = (
-                self.client.query
-                .get("CV", ["skills"])
+                self._get(["skills"])
                 .do()
             )
             
-            if not results or 'data' not in results or 'Get' not in results['data'] or 'CV' not in results['data']['Get']:
-                return {}
-                
             # Count skills
             skill_counts = {}
-            for cv in results['data']['Get']['CV']:
+            for cv in self.processor.get_objects(results):
                 if not cv.get('skills'):
                     continue
                 for skill in cv['skills']:
@@ -209,32 +272,105 @@ class CVAnalyzer:
     def get_cv_count(self):
         """Get the total number of CVs in the database"""
         try:
-            results = (
-                self.client.query
-                .aggregate("CV")
-                .with_meta_count()
-                .do()
-            )
-            
-            if results and 'data' in results and 'Aggregate' in results['data'] and 'CV' in results['data']['Aggregate']:
-                return results['data']['Aggregate']['CV'][0]['meta']['count']
-            return 0
-            
+            return self.processor.get_cv_count()
+
         except Exception as e:
             logger.error(f"Failed to get CV count: {str(e)}")
+            if "not active" in str(e).lower():
+                # Offloaded from elsewhere (e.g. another GUI instance); reactivate on the next view
+                self.needs_activation = True
             return 0
 
-    def process_cv_directory(self, directory_path: str, progress_bar):
-        """Process all PDFs in a directory"""
+    def ensure_active(self):
+        """Reactivate the requisition if it may have been offloaded; a no-op on most reruns"""
+        if self.tenant and self.needs_activation:
+            self.processor.ensure_partition(self.processor.tenant)
+            self.needs_activation = False
+
+    def offload(self):
+        """Move the requisition to cold storage until it is opened again"""
+        self.processor.offload_partition(self.processor.tenant)
+        self.needs_activation = True
+
+    def rank_candidates(self, weights: Dict[str, float], must_have: List[str] = None, query: str = None,
+                        alpha: float = 0.0, page_size: int = 10, cursor: str = None) -> Dict:
+        """Return one page of candidates ranked by weighted skills, see CandidateRanker.rank"""
+        empty = {'candidates': [], 'total': 0, 'offset': 0, 'next_cursor': None}
+        if not weights and not must_have:
+            return empty
         try:
-            # Process the CVs
-            self.processor.process_directory(directory_path, progress_bar.progress)
-            # Force refresh the CV count
-            st.session_state.cv_count = self.get_cv_count()
-            st.session_state.cv_processed = True
+            page = self.ranker.rank(weights, must_have, query, alpha, page_size, cursor)
+        except Exception as e:
+            logger.error(f"Failed to rank candidates for skills {list(weights)}: {str(e)}")
+            return empty
+
+        if page['total'] == 0 and not must_have and not cursor:
+            # Nothing is tagged with these skills, fall back to the fuzzy content search
+            fuzzy = self.find_candidates_by_skills(list(weights), page_size)
+            page = {'candidates': fuzzy, 'total': len(fuzzy), 'offset': 0, 'next_cursor': None}
+        return page
+
+    def load_dashboard(self, search: Dict, pool: ThreadPoolExecutor) -> Dict:
+        """Run the independent dashboard queries concurrently on pool, each bounded by QUERY_TIMEOUT"""
+        queries = {
+            'cv_count': (self.get_cv_count, {}, 0),
+            'skill_distribution': (self.get_skill_distribution, {}, {}),
+            'analytics': (self.get_skill_analytics, {}, {}),
+            'candidates': (
+                self.rank_candidates, search,
+                {'candidates': [], 'total': 0, 'offset': 0, 'next_cursor': None}
+            )
+        }
+        started = time.monotonic()
+        futures = {name: pool.submit(func, **kwargs) for name, (func, kwargs, _) in queries.items()}
+
+        dashboard = {'timed_out': []}
+        for name, future in futures.items():
+            # All queries started together, so one shared deadline is a per-query timeout
+            remaining = config.QUERY_TIMEOUT - (time.monotonic() - started)
+            try:
+                dashboard[name] = future.result(timeout=max(remaining, 0))
+            except FutureTimeoutError:
+                logger.warning(f"Dashboard query {name} timed out after {config.QUERY_TIMEOUT}s")
+                # Don't let a query that never got a worker run after its result was given up on
+                future.cancel()
+                dashboard[name] = queries[name][2]
+                dashboard['timed_out'].append(name)
+
+        logger.info(f"Loaded dashboard in {time.monotonic() - started:.3f}s")
+        return dashboard
+
+    def start_rebuild(self, directory_path: str) -> bool:
+        """Re-index a directory in a background thread; False if one is already running here"""
+        with self._rebuild_lock:
+            if self.rebuild_status.get('running'):
+                return False
+            self.rebuild_status = {'running': True, 'progress': 0.0, 'stored': None, 'error': None, 'finished_at': None}
+        threading.Thread(
+            target=self._run_rebuild, args=(directory_path, self.rebuild_status),
+            name=f"rebuild-{self.tenant or 'CV'}", daemon=True
+        ).start()
+        return True
+
+    def _run_rebuild(self, directory_path: str, status: Dict):
+        """Build a fresh index while the current one keeps serving searches, recording progress in status"""
+        try:
+            status['stored'] = rebuild_index(
+                directory_path, tenant=self.tenant,
+                progress_callback=lambda progress: status.update(progress=progress)
+            )
         except Exception as e:
             logger.error(f"Failed to process CV directory: {str(e)}")
-            raise
+            status['error'] = str(e)
+        finally:
+            status['finished_at'] = time.time()
+            status['running'] = False
+
+    def ingest_uploaded_file(self, file_path: str):
+        """Hand a freshly uploaded file to the ingestion pipeline"""
+        filename = os.path.relpath(file_path, self.processor.cv_directory).replace(os.sep, "/")
+        stored = self.processor.process_file(file_path, filename)
+        logger.info(f"Ingested {stored} CVs from uploaded file {filename}")
 
     def clear_database(self):
         """Clear all data from the database"""
@@ -246,6 +382,24 @@ class CVAnalyzer:
             logger.error(f"Failed to clear database: {str(e)}")
             raise
 
+@st.cache_resource(show_spinner=False)
+def get_analyzer(tenant: str = None) -> CVAnalyzer:
+    """Share one analyzer per partition across reruns and sessions"""
+    return CVAnalyzer(tenant=tenant)
+
+def get_query_pool() -> ThreadPoolExecutor:
+    """Dashboard query workers of the current session.
+
+    Analyzers are shared by every session, but a query that times out keeps its
+    worker until Weaviate answers, so each session gets its own workers and slow
+    queries only ever hold up the session that issued them.
+    """
+    if 'query_pool' not in st.session_state:
+        st.session_state.query_pool = ThreadPoolExecutor(
+            max_workers=config.QUERY_POOL_SIZE, thread_name_prefix="cv-query"
+        )
+    return st.session_state.query_pool
+
 def highlight_skills(text: str, selected_skills: List[str]) -> str:
     """Highlight skills in text with their respective colors"""
     highlighted = text
@@ -261,10 +415,17 @@ def get_cv_download_link(filename: str, directory_path: str) -> str:
     """Generate a download link for a CV file"""
     try:
         file_path = os.path.join(directory_path, filename)
-        with open(file_path, "rb") as f:
-            bytes_data = f.read()
+        if os.path.isfile(file_path):
+            with open(file_path, "rb") as f:
+                bytes_data = f.read()
+        else:
+            # CVs ingested from an archive are stored as "<archive>/<member>"
+            member = split_archive_path(directory_path, filename)
+            bytes_data = read_archive_member(*member) if member else None
+            if bytes_data is None:
+                raise FileNotFoundError(f"{filename} not found in {directory_path}")
         b64 = base64.b64encode(bytes_data).decode()
-        href = f'<a href="data:application/pdf;base64,{b64}" download="{filename}">Download {filename}</a>'
+        href = f'<a href="data:application/pdf;base64,{b64}" download="{os.path.basename(filename)}">Download {filename}</a>'
         return href
     except Exception as e:
         logger.error(f"Failed to generate download link for {filename}: {str(e)}")
@@ -303,6 +464,30 @@ def show_documentation():
     Contact support at support@example.com
     """)
 
+def select_requisition() -> str:
+    """Pick an existing requisition in the sidebar; new ones are only created on request"""
+    if 'requisitions' not in st.session_state:
+        st.session_state.requisitions = sorted(set(list_requisitions(get_client())) | {config.DEFAULT_TENANT})
+    # A requisition created on the previous run is selected before the widget is drawn
+    if st.session_state.get('new_requisition'):
+        st.session_state.requisition = st.session_state.pop('new_requisition')
+    elif st.session_state.get('requisition') not in st.session_state.requisitions:
+        st.session_state.requisition = config.DEFAULT_TENANT
+
+    tenant = st.sidebar.selectbox("Requisition", st.session_state.requisitions, key="requisition")
+
+    with st.sidebar.expander("New Requisition"):
+        name = st.text_input("Name", help="Up to 52 letters, digits, '-' or '_'").strip()
+        if st.button("Create Requisition"):
+            if not is_valid_partition(name):
+                st.error("❌ Requisition names are 1-52 letters, digits, '-' or '_'")
+            else:
+                if name not in st.session_state.requisitions:
+                    st.session_state.requisitions = sorted(st.session_state.requisitions + [name])
+                st.session_state.new_requisition = name
+                st.experimental_rerun()
+    return tenant
+
 def main():
     # Set page config at the very beginning
     st.set_page_config(
@@ -320,27 +505,78 @@ def main():
     if 'cv_count' not in st.session_state:
         st.session_state.cv_count = 0
 
-    # Initialize CV analyzer
-    analyzer = CVAnalyzer()
+    # Pick the requisition partition to work on
+    tenant = None
+    try:
+        with st.spinner("Waiting for Weaviate to be ready..."):
+            if config.MULTI_TENANCY:
+                tenant = select_requisition()
+            # Initialize CV analyzer
+            analyzer = get_analyzer(tenant)
+    except Exception as e:
+        logger.error(f"Failed to open requisition {tenant}: {str(e)}")
+        st.error(f"❌ Failed to open requisition {tenant}: {str(e)}")
+        st.stop()
+
+    # Selections belong to one partition, reset them on switch
+    if st.session_state.get('tenant') != analyzer.tenant:
+        st.session_state.tenant = analyzer.tenant
+        st.session_state.selected_skills = []
+        st.session_state.offloaded = None
+        analyzer.needs_activation = True
+
+    if analyzer.tenant:
+        if st.session_state.get('offloaded') == analyzer.tenant:
+            st.info(f"💤 Requisition {analyzer.tenant} is offloaded to cold storage.")
+            if st.button("Reopen Requisition"):
+                st.session_state.offloaded = None
+                st.experimental_rerun()
+            st.stop()
+
+        # The analyzer is cached across sessions, so a requisition another session
+        # offloaded is reactivated here, when it is next viewed, rather than at creation
+        analyzer.ensure_active()
+
+        if st.sidebar.button("Offload Requisition", help="Move this requisition to cold storage until it is opened again"):
+            analyzer.offload()
+            st.session_state.offloaded = analyzer.tenant
+            st.experimental_rerun()
     
     # Show documentation in sidebar
     show_documentation()
+    cache_stats = search_cache.stats()
+    st.sidebar.caption(
+        f"Search cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+        f"{cache_stats['entries']} entries ({cache_stats['bytes'] / 1024:.0f} KB)"
+    )
+    startup_timings = get_startup_timings()
+    if startup_timings:
+        st.sidebar.caption("Startup: " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in startup_timings.items()))
     
     # Main content
     st.title("CV Analysis Tool 📄")
     
     col1, col2 = st.columns(2)
     
-    # Process CV directory
+    # Process CV directory in the background; searches keep using the current index meanwhile
     if col1.button("Process CV Directory", use_container_width=True):
-        try:
-            progress_bar = st.progress(0)
-            analyzer.process_cv_directory(config.CV_DIR, progress_bar)
-            st.success("✅ Successfully processed CV directory!")
-            time.sleep(1)  # Give time for the success message to show
-            st.experimental_rerun()  # Rerun to update the interface
-        except Exception as e:
-            st.error(f"❌ Failed to process CV directory: {str(e)}")
+        if not analyzer.start_rebuild(analyzer.processor.cv_directory):
+            st.warning("⚠️ The CV directory is already being processed")
+    rebuild = analyzer.rebuild_status
+    if rebuild.get('running'):
+        st.progress(min(rebuild['progress'], 1.0))
+        st.info("🔄 Processing the CV directory in the background; searches use the current index until it is done")
+        st.button("Refresh Progress")
+    elif rebuild.get('finished_at') and rebuild['finished_at'] != st.session_state.get('rebuild_seen'):
+        # Report the outcome once per session
+        st.session_state.rebuild_seen = rebuild['finished_at']
+        if rebuild['error']:
+            st.error(f"❌ Failed to process CV directory: {rebuild['error']}")
+        elif rebuild['stored']:
+            st.session_state.cv_processed = True
+            st.success(f"✅ Successfully processed CV directory: {rebuild['stored']} CVs")
+        else:
+            st.warning("⚠️ No CVs found in the CV directory; the current index was kept")
     
     # Clear database
     if col2.button("Clear Database", use_container_width=True):
@@ -353,13 +589,59 @@ def main():
         except Exception as e:
             st.error(f"❌ Failed to clear database: {str(e)}")
     
+    # Upload a CV folder in chunks straight into the requisition's CV directory
+    upload_result = folder_uploader(
+        key="cv_folder_upload",
+        label="Upload CV Folder",
+        help="Drag and drop a folder of CVs or archives; each file is processed as soon as it arrives",
+        allowed_extensions=[".pdf", ".zip", ".tar", ".gz", ".tgz"],
+        max_file_size=config.UPLOAD_MAX_FILE_SIZE,
+        upload_dir=analyzer.processor.cv_directory,
+        on_file_complete=analyzer.ingest_uploaded_file,
+        chunk_size=config.UPLOAD_CHUNK_SIZE,
+        max_parallel_uploads=config.UPLOAD_MAX_PARALLEL,
+        upload_port=config.UPLOAD_SERVER_PORT,
+        upload_url=config.UPLOAD_PUBLIC_URL
+    )
+    if upload_result and upload_result.get('failed'):
+        st.warning(f"⚠️ {len(upload_result['failed'])} files could not be uploaded")
+
+    # Checkbox state for this run is already in session state, so candidates can be
+    # fetched together with the count and distribution rather than after them
+    all_skills = sorted(TECH_SKILLS.keys())
+    selected_skills = [
+        skill for skill in all_skills
+        if st.session_state.get(f"skill_{skill}", skill in st.session_state.selected_skills)
+    ]
+    role_query = st.session_state.get('role_query', '').strip()
+    search = {
+        'weights': {skill: st.session_state.get(f"weight_{skill}", 1.0) for skill in selected_skills},
+        'must_have': [skill for skill in st.session_state.get('must_have_skills', []) if skill in selected_skills],
+        'query': role_query or None,
+        'alpha': st.session_state.get('role_alpha', 0.3) if role_query else 0.0,
+        'page_size': config.RESULTS_PAGE_SIZE
+    }
+
+    # Cursors of the pages visited so far; a changed search starts again from page one
+    search_signature = repr(search)
+    if st.session_state.get('search_signature') != search_signature:
+        st.session_state.search_signature = search_signature
+        st.session_state.page_cursors = [None]
+    search['cursor'] = st.session_state.page_cursors[-1]
+
+    dashboard = analyzer.load_dashboard(search, get_query_pool())
+    if dashboard['timed_out']:
+        st.warning(f"⚠️ Some results may be incomplete, queries timed out: {', '.join(dashboard['timed_out'])}")
+
     # Show CV count
+    if 'cv_count' not in dashboard['timed_out']:
+        st.session_state.cv_count = dashboard['cv_count']
     cv_count = st.session_state.cv_count
     st.write(f"📊 Total CVs in database: {cv_count}")
     
     if cv_count > 0:
         # Get skill distribution
-        skill_dist = analyzer.get_skill_distribution()
+        skill_dist = dashboard['skill_distribution']
         
         # Plot skill distribution
         if skill_dist:
@@ -381,18 +663,52 @@ def main():
             )
             
             st.plotly_chart(fig, use_container_width=True)
+
+        # Co-occurrence and trends, read from the aggregates maintained at ingest
+        analytics = dashboard['analytics']
+        if analytics.get('skills'):
+            with st.expander("📈 Skill Analytics"):
+                matrix = analytics['cooccurrence']
+                top = np.argsort(-np.diag(matrix), kind="stable")[:25]
+                top_skills = [analytics['skills'][i] for i in top]
+                heatmap = go.Figure(data=go.Heatmap(
+                    z=matrix[np.ix_(top, top)],
+                    x=top_skills,
+                    y=top_skills,
+                    colorscale="Blues"
+                ))
+                heatmap.update_layout(
+                    title="Skill Co-occurrence (CVs mentioning both skills)",
+                    height=600
+                )
+                st.plotly_chart(heatmap, use_container_width=True)
+
+                if analytics['dates']:
+                    trend = go.Figure()
+                    trend.add_trace(go.Scatter(x=analytics['dates'], y=analytics['totals'], name="All CVs", mode="lines+markers"))
+                    for skill in st.session_state.selected_skills:
+                        if skill in analytics['per_skill']:
+                            trend.add_trace(go.Scatter(x=analytics['dates'], y=analytics['per_skill'][skill], name=skill, mode="lines+markers"))
+                    trend.update_layout(
+                        title="CVs Ingested per Day (selected skills shown separately)",
+                        xaxis_title="Date",
+                        yaxis_title="Number of CVs",
+                        height=400
+                    )
+                    st.plotly_chart(trend, use_container_width=True)
         
         # Skill selection
         st.subheader("🔍 Find Candidates by Skills")
         
         # Create columns for skill checkboxes
         cols = st.columns(4)
-        all_skills = sorted(TECH_SKILLS.keys())
         skills_per_col = len(all_skills) // 4 + (1 if len(all_skills) % 4 else 0)
         
         # Reset selected skills if requested
         if st.button("Clear Selected Skills", use_container_width=True):
             st.session_state.selected_skills = []
+            for skill in all_skills:
+                st.session_state[f"skill_{skill}"] = False
             st.experimental_rerun()
         
         # Display skill checkboxes in columns
@@ -410,16 +726,30 @@ def main():
         
         # Find candidates for selected skills
         if st.session_state.selected_skills:
-            candidates = analyzer.find_candidates_by_skills(st.session_state.selected_skills)
+            # Ranking options; must-haves are limited to the currently selected skills
+            st.session_state.must_have_skills = search['must_have']
+            with st.expander("⚖️ Ranking Options"):
+                st.multiselect("Must-have skills", st.session_state.selected_skills, key="must_have_skills")
+                weight_cols = st.columns(4)
+                for i, skill in enumerate(st.session_state.selected_skills):
+                    weight_cols[i % 4].slider(f"{skill} weight", 0.0, 5.0, 1.0, 0.5, key=f"weight_{skill}")
+                st.text_input("Describe the role (optional)", key="role_query",
+                              help="Blends semantic similarity to this description into the ranking")
+                st.slider("Description influence", 0.0, 1.0, 0.3, 0.05, key="role_alpha")
+
+            results = dashboard['candidates']
+            candidates = results['candidates']
             
             if candidates:
-                st.write(f"Found {len(candidates)} candidates with selected skills:")
+                first = results['offset'] + 1
+                st.write(f"Found {results['total']} candidates with selected skills (showing {first}-{first + len(candidates) - 1}):")
                 
                 for candidate in candidates:
                     matching_skills = [s for s in candidate['skills'] if s in st.session_state.selected_skills]
                     other_skills = [s for s in candidate['skills'] if s not in st.session_state.selected_skills]
+                    score = f", score {candidate['score']:.2f}" if 'score' in candidate else ""
                     
-                    with st.expander(f"📄 {candidate['filename']} ({candidate['matching_count']} matching skills)"):
+                    with st.expander(f"📄 {candidate['filename']} ({candidate['matching_count']} matching skills{score})"):
                         # Show matching skills first, then other skills
                         if matching_skills:
                             st.write("**Matching Skills:**", ", ".join(matching_skills))
@@ -431,8 +761,17 @@ def main():
                         st.markdown(highlighted_content)
                         
                         # Add download link
-                        download_link = get_cv_download_link(candidate['filename'], config.CV_DIR)
+                        download_link = get_cv_download_link(candidate['filename'], analyzer.processor.cv_directory)
                         st.markdown(download_link, unsafe_allow_html=True)
+
+                # Page through the cached ranking
+                prev_col, next_col = st.columns(2)
+                if len(st.session_state.page_cursors) > 1 and prev_col.button("⬅️ Previous Page", use_container_width=True):
+                    st.session_state.page_cursors.pop()
+                    st.experimental_rerun()
+                if results['next_cursor'] and next_col.button("Next Page ➡️", use_container_width=True):
+                    st.session_state.page_cursors.append(results['next_cursor'])
+                    st.experimental_rerun()
             else:
                 st.warning("No candidates found with selected skills.")
         else:
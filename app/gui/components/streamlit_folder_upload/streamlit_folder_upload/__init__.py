@@ -1,6 +1,8 @@
 import os
 import streamlit.components.v1 as components
-from typing import List, Optional, Dict, Any
+from typing import Callable, List, Optional, Dict, Any
+
+from .upload_server import get_upload_server
 
 # Get absolute path to the frontend directory
 FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend")
@@ -18,7 +20,13 @@ def folder_uploader(
     accept_multiple_files: bool = True,
     allowed_extensions: Optional[List[str]] = None,
     max_file_size: int = 200 * 1024 * 1024,  # 200MB
-    height: int = 200
+    height: int = 200,
+    upload_dir: Optional[str] = None,
+    on_file_complete: Optional[Callable[[str], None]] = None,
+    chunk_size: int = 5 * 1024 * 1024,  # 5MB
+    max_parallel_uploads: int = 3,
+    upload_port: int = 8502,
+    upload_url: Optional[str] = None
 ) -> Optional[Dict[str, Any]]:
     """
     Create a folder upload component.
@@ -39,6 +47,21 @@ def folder_uploader(
         Maximum file size in bytes (default: 200MB)
     height : int
         Height of the upload area in pixels
+    upload_dir : str
+        Directory the files are written to. When set, files are uploaded in
+        chunks to a background upload server instead of only being listed
+    on_file_complete : Callable[[str], None]
+        Called with the path of every file as soon as it has been fully written.
+        The upload server is shared by every session, so this should only
+        depend on upload_dir (use one upload_dir per destination)
+    chunk_size : int
+        Size of each uploaded chunk in bytes (default: 5MB)
+    max_parallel_uploads : int
+        Maximum number of files uploaded at the same time
+    upload_port : int
+        Port the upload server listens on
+    upload_url : str
+        Public base URL of the upload server, if it differs from the page host
     
     Returns
     -------
@@ -47,6 +70,8 @@ def folder_uploader(
         - path: The selected folder path
         - files: List of files in the folder
         - error: Any error message
+        - uploaded: Relative paths of the files written to upload_dir
+        - failed: Relative paths of the files that could not be uploaded
     """
     
     # Prepare component configuration
@@ -58,6 +83,22 @@ def folder_uploader(
         "max_file_size": max_file_size,
         "height": height
     }
+
+    if upload_dir:
+        server = get_upload_server(
+            upload_port,
+            max_chunk_size=chunk_size,
+            max_file_size=max_file_size,
+            allowed_extensions=allowed_extensions
+        )
+        component_config.update({
+            "upload_url": upload_url,
+            "upload_port": upload_port,
+            "upload_token": server.token,
+            "upload_route": server.register(upload_dir, on_file_complete),
+            "chunk_size": chunk_size,
+            "max_parallel_uploads": max_parallel_uploads
+        })
     
     # Call component function
     component_value = _component_func(config=component_config, key=key)
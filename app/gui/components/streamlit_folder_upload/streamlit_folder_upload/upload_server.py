@@ -0,0 +1,264 @@
+import os
+import re
+import glob
+import queue
+import hashlib
+import secrets
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+logger = logging.getLogger('streamlit_folder_upload')
+
+PARTIAL_SUFFIX = ".part"
+# "<lastModified>-<size>" of the client's file, identifying the version being uploaded
+FINGERPRINT = re.compile(r"^\d{1,20}-\d{1,20}$")
+FINGERPRINT_XATTR = "user.upload_fingerprint"
+# Uploads of the same file are serialized on one of a fixed set of locks, however many files arrive
+LOCK_STRIPES = 64
+
+
+class UploadServer:
+    """Small HTTP server that receives resumable, chunked uploads straight into directories.
+
+    Every upload directory is registered under a route of its own, so uploads for
+    different directories (e.g. one per requisition) never mix.
+
+    Protocol (one URL per file, ``/upload/<route>/<relative path>``):
+
+    - ``HEAD`` returns the number of bytes already received in ``Upload-Offset``
+    - ``PUT`` appends one chunk; the request must carry ``Upload-Offset`` (where the
+      chunk starts) and ``Upload-Length`` (total file size). A mismatched offset is
+      answered with ``409`` and the server's current offset so the client can resume.
+
+    Both carry ``Upload-Fingerprint`` (the client file's ``lastModified-size``).
+    Partial uploads are kept per fingerprint, and a finished file is only reported
+    as complete when it was uploaded from the same version of the client's file
+    (recorded in an extended attribute where the filesystem supports them).
+
+    Completed files are renamed into place and handed to their directory's
+    ``on_file_complete`` from a single background worker, so ingestion starts while
+    the rest of the folder uploads.
+    """
+
+    def __init__(
+        self,
+        port: int,
+        max_chunk_size: int,
+        max_file_size: int,
+        allowed_extensions: Optional[List[str]] = None
+    ):
+        self.port = port
+        self.max_chunk_size = max_chunk_size
+        self.max_file_size = max_file_size
+        self.allowed_extensions = [ext.lower() for ext in allowed_extensions or []]
+        self.token = secrets.token_urlsafe(16)
+        self._routes: Dict[str, Tuple[str, Optional[Callable[[str], None]]]] = {}
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self._routes_lock = threading.Lock()
+        self._completed: "queue.Queue[Tuple[str, str]]" = queue.Queue()
+        self._httpd = ThreadingHTTPServer(("0.0.0.0", port), self._make_handler())
+        self._httpd.daemon_threads = True
+
+    def start(self) -> None:
+        """Start serving uploads and the ingestion worker in daemon threads"""
+        threading.Thread(target=self._httpd.serve_forever, name="upload-server", daemon=True).start()
+        threading.Thread(target=self._ingest_worker, name="upload-ingest", daemon=True).start()
+        logger.info(f"Upload server listening on port {self.port}")
+
+    def register(self, upload_dir: str, on_file_complete: Optional[Callable[[str], None]] = None) -> str:
+        """Accept uploads into a directory and return the route clients upload it through.
+
+        The server is shared by every session, so on_file_complete should only
+        depend on the directory; a later registration replaces an earlier one.
+        """
+        upload_dir = os.path.realpath(upload_dir)
+        route = hashlib.sha256(upload_dir.encode("utf-8")).hexdigest()[:16]
+        os.makedirs(upload_dir, exist_ok=True)
+        with self._routes_lock:
+            if route not in self._routes:
+                logger.info(f"Accepting uploads into {upload_dir}")
+            if route not in self._routes or on_file_complete is not None:
+                self._routes[route] = (upload_dir, on_file_complete)
+        return route
+
+    def resolve(self, route: str, relative_path: str) -> Optional[str]:
+        """Map a client supplied route and relative path to a file inside that route's directory"""
+        with self._routes_lock:
+            upload_dir = self._routes.get(route, (None, None))[0]
+        if not upload_dir:
+            return None
+        target = os.path.realpath(os.path.join(upload_dir, relative_path.lstrip("/")))
+        if not target.startswith(upload_dir + os.sep):
+            return None
+        if self.allowed_extensions and os.path.splitext(target)[1].lower() not in self.allowed_extensions:
+            return None
+        return target
+
+    def lock_for(self, path: str) -> threading.Lock:
+        digest = hashlib.blake2b(path.encode("utf-8"), digest_size=8).digest()
+        return self._locks[int.from_bytes(digest, "big") % LOCK_STRIPES]
+
+    @staticmethod
+    def partial_path(path: str, fingerprint: str) -> str:
+        return f"{path}.{fingerprint}{PARTIAL_SUFFIX}"
+
+    @staticmethod
+    def stored_fingerprint(path: str) -> Optional[str]:
+        """Fingerprint of the upload a finished file came from, if it was recorded"""
+        try:
+            return os.getxattr(path, FINGERPRINT_XATTR).decode("ascii")
+        except (AttributeError, OSError):
+            return None
+
+    def received_bytes(self, path: str, total: int, fingerprint: str) -> int:
+        """Return how many bytes of this version of a file have already been stored"""
+        if (os.path.exists(path) and os.path.getsize(path) == total
+                and self.stored_fingerprint(path) == fingerprint):
+            return total
+        partial = self.partial_path(path, fingerprint)
+        return os.path.getsize(partial) if os.path.exists(partial) else 0
+
+    def complete(self, route: str, path: str, fingerprint: str) -> None:
+        os.replace(self.partial_path(path, fingerprint), path)
+        try:
+            os.setxattr(path, FINGERPRINT_XATTR, fingerprint.encode("ascii"))
+        except (AttributeError, OSError) as e:
+            # Only costs a re-upload if the same file is sent again
+            logger.debug(f"Could not record the upload fingerprint of {path}: {str(e)}")
+        # Partial uploads of other versions of the file are superseded
+        for stale in glob.glob(f"{glob.escape(path)}.*{PARTIAL_SUFFIX}"):
+            os.remove(stale)
+        logger.info(f"Upload complete: {path}")
+        self._completed.put((route, path))
+
+    def _ingest_worker(self) -> None:
+        while True:
+            route, path = self._completed.get()
+            with self._routes_lock:
+                on_file_complete = self._routes[route][1]
+            if not on_file_complete:
+                continue
+            try:
+                on_file_complete(path)
+            except Exception as e:
+                logger.error(f"Failed to hand {path} to ingestion: {str(e)}")
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+            def _send(self, status: int, offset: Optional[int] = None) -> None:
+                self.send_response(status)
+                self.send_header("Access-Control-Allow-Origin", "*")
+                self.send_header("Access-Control-Allow-Methods", "HEAD, PUT, OPTIONS")
+                self.send_header("Access-Control-Allow-Headers", "Upload-Offset, Upload-Length, Upload-Token, Upload-Fingerprint, Content-Type")
+                self.send_header("Access-Control-Expose-Headers", "Upload-Offset")
+                if offset is not None:
+                    self.send_header("Upload-Offset", str(offset))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def _target(self) -> Optional[Tuple[str, str]]:
+                if self.headers.get("Upload-Token") != server.token:
+                    self._send(403)
+                    return None
+                path = urlparse(self.path).path
+                if not path.startswith("/upload/"):
+                    self._send(404)
+                    return None
+                route, _, relative_path = path[len("/upload/"):].partition("/")
+                target = server.resolve(unquote(route), unquote(relative_path))
+                if not target:
+                    self._send(400)
+                    return None
+                return unquote(route), target
+
+            def _fingerprint(self) -> Optional[str]:
+                fingerprint = self.headers.get("Upload-Fingerprint", "")
+                return fingerprint if FINGERPRINT.match(fingerprint) else None
+
+            def _int_header(self, name: str) -> Optional[int]:
+                try:
+                    return int(self.headers.get(name, ""))
+                except ValueError:
+                    return None
+
+            def do_OPTIONS(self):
+                self._send(204)
+
+            def do_HEAD(self):
+                resolved = self._target()
+                if not resolved:
+                    return
+                _, target = resolved
+                total = self._int_header("Upload-Length")
+                fingerprint = self._fingerprint()
+                if total is None or fingerprint is None:
+                    self._send(400)
+                    return
+                self._send(200, server.received_bytes(target, total, fingerprint))
+
+            def do_PUT(self):
+                resolved = self._target()
+                if not resolved:
+                    return
+                route, target = resolved
+                offset = self._int_header("Upload-Offset")
+                total = self._int_header("Upload-Length")
+                length = self._int_header("Content-Length")
+                fingerprint = self._fingerprint()
+                if offset is None or total is None or length is None or fingerprint is None:
+                    self._send(400)
+                    return
+                if length > server.max_chunk_size or total > server.max_file_size or offset + length > total:
+                    self._send(413)
+                    return
+
+                with server.lock_for(target):
+                    current = server.received_bytes(target, total, fingerprint)
+                    if offset != current:
+                        # Drain the body so the connection can be reused, then tell the client where to resume
+                        self.rfile.read(length)
+                        self._send(409, current)
+                        return
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    with open(server.partial_path(target, fingerprint), "ab") as partial:
+                        remaining = length
+                        while remaining:
+                            chunk = self.rfile.read(min(remaining, 1024 * 1024))
+                            if not chunk:
+                                break
+                            partial.write(chunk)
+                            remaining -= len(chunk)
+                    received = server.received_bytes(target, total, fingerprint)
+                    if received == total:
+                        server.complete(route, target, fingerprint)
+                        received = total
+                self._send(204, received)
+
+        return Handler
+
+
+_server: Optional[UploadServer] = None
+_server_guard = threading.Lock()
+
+
+def get_upload_server(
+    port: int,
+    max_chunk_size: int,
+    max_file_size: int,
+    allowed_extensions: Optional[List[str]] = None
+) -> UploadServer:
+    """Return the process-wide upload server, starting it on first use"""
+    global _server
+    with _server_guard:
+        if _server is None:
+            _server = UploadServer(port, max_chunk_size, max_file_size, allowed_extensions)
+            _server.start()
+        return _server
@@ -0,0 +1,258 @@
+import os
+import sys
+import time
+import fcntl
+import logging
+import argparse
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger('CV_Processor')
+
+SECONDS_PER_DAY = 86400
+
+
+def epoch_day(timestamp: str = None) -> int:
+    """Days since 1970-01-01 UTC of an RFC 3339 timestamp (as Weaviate returns dates), or of now"""
+    if not timestamp:
+        return int(time.time() // SECONDS_PER_DAY)
+    moment = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() // SECONDS_PER_DAY)
+
+
+class SkillAggregates:
+    """Dashboard analytics kept up to date by ingest and delete instead of recomputed per view.
+
+    Holds per-skill CV counts, a skill co-occurrence matrix and per-day ingest
+    counts (overall and per skill) as NumPy arrays in one .npz file. Writers take
+    an exclusive lock on a sidecar file and replace the .npz atomically, so the GUI
+    and the processor container can both update it; readers only re-load it when
+    its stat changes, so every view is served from memory. Bulk ingestion wraps
+    its work in batch() so the file is rewritten once per batch, not per CV.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stamp = None
+        # Changes buffered by batch(), per thread: a list of (skills, day, sign)
+        self._local = threading.local()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.skills: List[str] = []
+        self.total = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.cooccurrence = np.zeros((0, 0), dtype=np.int64)
+        self.days = np.zeros(0, dtype=np.int64)
+        self.day_totals = np.zeros(0, dtype=np.int64)
+        self.day_skills = np.zeros((0, 0), dtype=np.int64)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size, stat.st_ino
+        except FileNotFoundError:
+            return None
+
+    def _refresh(self) -> None:
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return
+        self._reset()
+        if stamp is not None:
+            with np.load(self.path) as data:
+                self.skills = [str(skill) for skill in data["skills"]]
+                self.total = int(data["total"])
+                self.counts = data["counts"]
+                self.cooccurrence = data["cooccurrence"]
+                self.days = data["days"]
+                self.day_totals = data["day_totals"]
+                self.day_skills = data["day_skills"]
+        self._stamp = stamp
+
+    @contextmanager
+    def _update(self):
+        """Modify the aggregates under a lock shared with every other process, then persist them"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._lock, open(f"{self.path}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._refresh()
+            try:
+                yield
+            except Exception:
+                # Drop the half-applied change; the next access reloads the file
+                self._stamp = None
+                raise
+            tmp_path = f"{self.path}.{os.getpid()}.tmp.npz"
+            np.savez(
+                tmp_path,
+                skills=np.array(self.skills, dtype=str),
+                total=np.int64(self.total),
+                counts=self.counts,
+                cooccurrence=self.cooccurrence,
+                days=self.days,
+                day_totals=self.day_totals,
+                day_skills=self.day_skills
+            )
+            os.replace(tmp_path, self.path)
+            self._stamp = self._file_stamp()
+
+    def _indices(self, skills: Iterable[str]) -> np.ndarray:
+        """Column of each skill, growing the vocabulary for skills seen for the first time"""
+        skills = sorted(set(skills))
+        new = [skill for skill in skills if skill not in self.skills]
+        if new:
+            grow = len(new)
+            self.skills = self.skills + new
+            self.counts = np.pad(self.counts, (0, grow))
+            self.cooccurrence = np.pad(self.cooccurrence, ((0, grow), (0, grow)))
+            self.day_skills = np.pad(self.day_skills, ((0, 0), (0, grow)))
+        columns = {skill: i for i, skill in enumerate(self.skills)}
+        return np.array([columns[skill] for skill in skills], dtype=np.intp)
+
+    def _day_row(self, day: int) -> int:
+        """Row of a day bucket, inserting it (in order) if it doesn't exist yet"""
+        row = int(np.searchsorted(self.days, day))
+        if row == len(self.days) or self.days[row] != day:
+            self.days = np.insert(self.days, row, day)
+            self.day_totals = np.insert(self.day_totals, row, 0)
+            self.day_skills = np.insert(self.day_skills, row, 0, axis=0)
+        return row
+
+    def _apply(self, skills: Iterable[str], day: Optional[int], sign: int) -> None:
+        columns = self._indices(skills or [])
+        self.total += sign
+        self.counts[columns] += sign
+        self.cooccurrence[np.ix_(columns, columns)] += sign
+        if day is not None:
+            row = self._day_row(day)
+            self.day_totals[row] += sign
+            self.day_skills[row, columns] += sign
+
+    def _record(self, changes: List[Tuple[List[str], Optional[int], int]]) -> None:
+        pending = getattr(self._local, "pending", None)
+        if pending is None:
+            with self._update():
+                for skills, day, sign in changes:
+                    self._apply(skills, day, sign)
+            return
+        pending.extend(changes)
+        if len(pending) >= self._local.flush_every:
+            self._flush()
+
+    def _flush(self) -> None:
+        pending, self._local.pending = self._local.pending, []
+        if pending:
+            with self._update():
+                for skills, day, sign in pending:
+                    self._apply(skills, day, sign)
+
+    @contextmanager
+    def batch(self, flush_every: int = 500):
+        """Buffer this thread's add/remove calls and write them once every flush_every changes and at the end.
+
+        A crash loses at most one batch of counts; recompute_aggregates() repairs that.
+        """
+        if getattr(self._local, "pending", None) is not None:
+            # Already batching further up the call stack
+            yield
+            return
+        self._local.pending = []
+        self._local.flush_every = flush_every
+        try:
+            yield
+        finally:
+            try:
+                self._flush()
+            finally:
+                self._local.pending = None
+
+    def add(self, skills: List[str], day: int = None,
+            replaces: Tuple[List[str], Optional[int]] = None) -> None:
+        """Count a stored CV; day is its epoch_day(), if known.
+
+        replaces is the (skills, day) of the version the CV replaced, which is
+        uncounted in the same update.
+        """
+        changes = [(skills, day, 1)]
+        if replaces:
+            changes.insert(0, (replaces[0], replaces[1], -1))
+        self._record(changes)
+
+    def remove(self, skills: List[str], day: int = None) -> None:
+        """Uncount a deleted CV"""
+        self._record([(skills, day, -1)])
+
+    def replace(self, documents: Iterable[Tuple[List[str], Optional[int]]]) -> None:
+        """Recompute everything from (skills, day) pairs, e.g. after a bulk load"""
+        with self._update():
+            self._reset()
+            for skills, day in documents:
+                self._apply(skills, day, 1)
+
+    def clear(self) -> None:
+        with self._update():
+            self._reset()
+
+    def skill_counts(self) -> Dict[str, int]:
+        """Number of CVs mentioning each skill"""
+        with self._lock:
+            self._refresh()
+            return {skill: int(count) for skill, count in zip(self.skills, self.counts) if count > 0}
+
+    def cooccurrence_matrix(self) -> Tuple[List[str], np.ndarray]:
+        """Skills present in any CV and how many CVs mention each pair (the diagonal is the skill count)"""
+        with self._lock:
+            self._refresh()
+            present = np.flatnonzero(self.counts > 0)
+            return [self.skills[i] for i in present], self.cooccurrence[np.ix_(present, present)].copy()
+
+    def ingest_trend(self) -> Tuple[List[str], np.ndarray, Dict[str, np.ndarray]]:
+        """Per-day ingest counts: (ISO dates, CVs per day, CVs per day for each skill)"""
+        with self._lock:
+            self._refresh()
+            dates = [time.strftime("%Y-%m-%d", time.gmtime(int(day) * SECONDS_PER_DAY)) for day in self.days]
+            per_skill = {
+                skill: self.day_skills[:, i].copy()
+                for i, skill in enumerate(self.skills) if self.counts[i] > 0
+            }
+            return dates, self.day_totals.copy(), per_skill
+
+
+def recompute_aggregates(processor) -> int:
+    """Rebuild a processor's aggregates from a scan of its index, returning the CVs counted.
+
+    Used to backfill indexes created before aggregates were maintained, or to
+    repair drift after a crash between storing a CV and counting it.
+    """
+    started = time.monotonic()
+    documents = [
+        (obj.get('skills') or [], epoch_day(obj['ingestedAt']) if obj.get('ingestedAt') else None)
+        for obj in processor.iter_objects(["skills", "ingestedAt"])
+    ]
+    processor.aggregates.replace(documents)
+    logger.info(f"Recomputed skill aggregates over {len(documents)} CVs in {time.monotonic() - started:.1f}s")
+    return len(documents)
+
+
+def main(argv: List[str] = None) -> None:
+    from processor.processor import CVProcessor
+
+    parser = argparse.ArgumentParser(description="Recompute the skill analytics aggregates from the CV index")
+    parser.add_argument("--tenant", help="Requisition partition to recompute")
+    args = parser.parse_args(argv)
+    recompute_aggregates(CVProcessor(tenant=args.tenant))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
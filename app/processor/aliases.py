@@ -0,0 +1,70 @@
+import os
+import json
+import logging
+import threading
+from typing import Dict, Optional
+
+import config
+
+logger = logging.getLogger('CV_Processor')
+
+
+class AliasMap:
+    """Map logical index names to the physical Weaviate class or tenant currently serving them.
+
+    The map is a small JSON file shared by every process. Switching rewrites it
+    under a temporary name and renames it into place, so readers see either the
+    old or the new target and never a partial one. Readers only re-read the file
+    when its stat changes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._stamp = None
+        self._aliases: Dict[str, str] = {}
+
+    def _load(self) -> Dict[str, str]:
+        try:
+            stat = os.stat(self.path)
+            stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        except FileNotFoundError:
+            stamp = None
+        if stamp != self._stamp:
+            with self._lock:
+                aliases = {}
+                if stamp is not None:
+                    with open(self.path) as f:
+                        aliases = json.load(f)
+                self._aliases, self._stamp = aliases, stamp
+        return self._aliases
+
+    @staticmethod
+    def initial(logical: str) -> str:
+        """Physical name of a logical one that was never switched: the class itself, or the partition's own tenant"""
+        return logical.rpartition("/")[2]
+
+    def resolve(self, logical: str) -> str:
+        """Return the physical name behind a logical one"""
+        return self._load().get(logical) or self.initial(logical)
+
+    def aliases(self) -> Dict[str, str]:
+        """Every logical name that has been switched, with its physical target"""
+        return dict(self._load())
+
+    def switch(self, logical: str, physical: str) -> Optional[str]:
+        """Atomically point a logical name at a new physical target, returning the previous one"""
+        with self._lock:
+            aliases = dict(self._load())
+            previous = aliases.get(logical) or self.initial(logical)
+            aliases[logical] = physical
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(aliases, f, indent=2)
+            os.replace(tmp_path, self.path)
+        logger.info(f"Switched {logical} from {previous} to {physical}")
+        return previous
+
+
+# Shared by every processor and analyzer in the process
+index_aliases = AliasMap(os.path.join(config.INDEX_DIR, "aliases.json"))
@@ -0,0 +1,140 @@
+import io
+import os
+import posixpath
+import tarfile
+import zipfile
+import logging
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+import config
+
+logger = logging.getLogger('CV_Processor')
+
+
+class ArchiveLimitExceeded(Exception):
+    """Raised when an archive trips one of the zip bomb guards"""
+
+
+def is_archive(path: str) -> bool:
+    """Check whether a path looks like a supported CV archive"""
+    name = path.lower()
+    return any(name.endswith(ext) for ext in config.ARCHIVE_EXTENSIONS)
+
+
+def _normalize_member_name(name: str) -> Optional[str]:
+    """Normalize an archive member path, rejecting absolute or escaping paths"""
+    normalized = posixpath.normpath(name.replace("\\", "/")).lstrip("/")
+    if not normalized or normalized == "." or normalized.startswith(".."):
+        return None
+    return normalized
+
+
+def _read_bounded(stream: BinaryIO, limit: int) -> io.BytesIO:
+    """Read a member into memory in chunks, never buffering more than limit bytes"""
+    buffer = io.BytesIO()
+    while True:
+        chunk = stream.read(min(config.ARCHIVE_READ_CHUNK_SIZE, limit + 1 - buffer.tell()))
+        if not chunk:
+            break
+        buffer.write(chunk)
+        if buffer.tell() > limit:
+            raise ArchiveLimitExceeded(f"Member exceeds {limit} bytes once decompressed")
+    buffer.seek(0)
+    return buffer
+
+
+class _Budget:
+    """Track decompressed bytes and member count across a whole archive"""
+
+    def __init__(self, archive_size: int):
+        self.archive_size = max(archive_size, 1)
+        self.members = 0
+        self.total = 0
+
+    def admit(self) -> None:
+        self.members += 1
+        if self.members > config.ARCHIVE_MAX_MEMBERS:
+            raise ArchiveLimitExceeded(f"Archive has more than {config.ARCHIVE_MAX_MEMBERS} members")
+
+    def consume(self, size: int) -> None:
+        self.total += size
+        if self.total > config.ARCHIVE_MAX_TOTAL_SIZE:
+            raise ArchiveLimitExceeded(f"Archive expands beyond {config.ARCHIVE_MAX_TOTAL_SIZE} bytes")
+        if self.total / self.archive_size > config.ARCHIVE_MAX_COMPRESSION_RATIO:
+            raise ArchiveLimitExceeded(
+                f"Archive compression ratio exceeds {config.ARCHIVE_MAX_COMPRESSION_RATIO}"
+            )
+
+
+def _iter_zip(archive_path: str, budget: _Budget) -> Iterator[Tuple[str, io.BytesIO]]:
+    with zipfile.ZipFile(archive_path) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            budget.admit()
+            name = _normalize_member_name(info.filename)
+            if not name or not name.lower().endswith(".pdf"):
+                continue
+            if info.file_size > config.ARCHIVE_MAX_MEMBER_SIZE:
+                logger.warning(f"Skipping {name}: declared size {info.file_size} exceeds limit")
+                continue
+            if info.compress_size and info.file_size / info.compress_size > config.ARCHIVE_MAX_COMPRESSION_RATIO:
+                raise ArchiveLimitExceeded(f"Member {name} has a suspicious compression ratio")
+            # Declared sizes can lie, so the read itself is bounded as well
+            with archive.open(info) as stream:
+                buffer = _read_bounded(stream, config.ARCHIVE_MAX_MEMBER_SIZE)
+            budget.consume(buffer.getbuffer().nbytes)
+            yield name, buffer
+
+
+def _iter_tar(archive_path: str, budget: _Budget) -> Iterator[Tuple[str, io.BytesIO]]:
+    # Stream mode reads members sequentially without seeking back through the archive
+    with tarfile.open(archive_path, mode="r|*") as archive:
+        for member in archive:
+            if not member.isfile():
+                continue
+            budget.admit()
+            name = _normalize_member_name(member.name)
+            if not name or not name.lower().endswith(".pdf"):
+                continue
+            if member.size > config.ARCHIVE_MAX_MEMBER_SIZE:
+                logger.warning(f"Skipping {name}: size {member.size} exceeds limit")
+                continue
+            stream = archive.extractfile(member)
+            if stream is None:
+                continue
+            buffer = _read_bounded(stream, config.ARCHIVE_MAX_MEMBER_SIZE)
+            budget.consume(buffer.getbuffer().nbytes)
+            yield name, buffer
+
+
+def iter_archive_members(archive_path: str) -> Iterator[Tuple[str, io.BytesIO]]:
+    """Yield (member path, in-memory stream) for each PDF inside a zip or tar archive.
+
+    Only one member is buffered at a time. Raises ArchiveLimitExceeded when the
+    archive looks like a zip bomb.
+    """
+    budget = _Budget(os.path.getsize(archive_path))
+    if zipfile.is_zipfile(archive_path):
+        yield from _iter_zip(archive_path, budget)
+    else:
+        yield from _iter_tar(archive_path, budget)
+
+
+def split_archive_path(directory_path: str, filename: str) -> Optional[Tuple[str, str]]:
+    """Split a stored "<archive>/<member>" filename into the archive on disk and the member path"""
+    parts = filename.split("/")
+    for i in range(1, len(parts)):
+        archive_path = os.path.join(directory_path, *parts[:i])
+        if is_archive(archive_path) and os.path.isfile(archive_path):
+            return archive_path, "/".join(parts[i:])
+    return None
+
+
+def read_archive_member(archive_path: str, member_name: str) -> Optional[bytes]:
+    """Read a single PDF out of an archive, under the same guards as ingestion"""
+    for name, stream in iter_archive_members(archive_path):
+        with stream:
+            if name == member_name:
+                return stream.getvalue()
+    return None
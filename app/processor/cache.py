@@ -0,0 +1,133 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import config
+
+logger = logging.getLogger('CV_Processor')
+
+
+def _estimate_size(value: Any) -> int:
+    """Roughly estimate the memory held by a cached result"""
+    if isinstance(value, (str, bytes)):
+        return len(value) + 50
+    if isinstance(value, dict):
+        return 100 + sum(_estimate_size(k) + _estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return 60 + sum(_estimate_size(item) for item in value)
+    return 30
+
+
+class ResultCache:
+    """LRU cache for query results, bounded by an estimated memory budget.
+
+    Entries are only valid for the index generation they were computed under. The
+    generation lives in a small file shared by every process writing to the index,
+    so an ingest in the processor container also invalidates the GUI's cache; each
+    lookup costs a single os.stat to notice that.
+    """
+
+    def __init__(self, max_bytes: int, generation_path: str):
+        self.max_bytes = max_bytes
+        self.generation_path = generation_path
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._generation_stamp = None
+        self._generation = 0
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+
+    def generation(self) -> int:
+        """Return the current index generation, re-reading the file only when it changed"""
+        self._refresh()
+        return self._generation
+
+    def token(self) -> int:
+        """Return a token to take before querying and hand back to put()"""
+        self._refresh()
+        return self._epoch
+
+    def _refresh(self) -> None:
+        try:
+            stat = os.stat(self.generation_path)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            stamp = None
+        if stamp != self._generation_stamp:
+            with self._lock:
+                if stamp == self._generation_stamp:
+                    return
+                self._generation_stamp = stamp
+                self._generation = self._read_generation()
+                self._epoch += 1
+                self._entries.clear()
+                self._bytes = 0
+
+    def _read_generation(self) -> int:
+        try:
+            with open(self.generation_path) as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def bump_generation(self) -> None:
+        """Invalidate every cached result, in this and every other process"""
+        with self._lock:
+            generation = self._read_generation() + 1
+            tmp_path = f"{self.generation_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(str(generation))
+            os.replace(tmp_path, self.generation_path)
+        logger.debug(f"Index generation is now {generation}")
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return a cached result, or None on a miss"""
+        self._refresh()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, token: int = None) -> None:
+        """Cache a result, evicting least recently used entries to stay within max_bytes.
+
+        Pass the token() taken before running the query so a result computed
+        against an index that changed in the meantime is not cached.
+        """
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return
+        self._refresh()
+        with self._lock:
+            if token is not None and token != self._epoch:
+                return
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and current usage"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "generation": self._generation
+            }
+
+
+# Shared by every analyzer and session in the process
+search_cache = ResultCache(config.SEARCH_CACHE_MAX_BYTES, os.path.join(config.INDEX_DIR, "generation"))
@@ -0,0 +1,163 @@
+import os
+import re
+import zlib
+import hashlib
+import logging
+import sqlite3
+import threading
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger('CV_Processor')
+
+# Mersenne prime 2^31 - 1: keeps (a * x + b) inside uint64 for 32-bit shingle hashes
+_PRIME = np.uint64((1 << 31) - 1)
+
+
+class DuplicateMatch(NamedTuple):
+    doc_id: str
+    canonical_id: str
+    filename: str
+    similarity: float
+
+
+def _lsh_params(threshold: float, num_perm: int, false_negative_weight: float = 0.9) -> Tuple[int, int]:
+    """Choose (bands, rows) minimising the weighted error area of the LSH S-curve.
+
+    False negatives are weighted up: a missed duplicate ends up in the index for
+    good, while a false positive only costs one extra signature comparison.
+    """
+    def collision(similarity, bands, rows):
+        return 1.0 - (1.0 - similarity ** rows) ** bands
+
+    below = np.linspace(0.0, threshold, 100)
+    above = np.linspace(threshold, 1.0, 100)
+    best, best_error = None, float("inf")
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            false_positive = collision(below, bands, rows).mean() * threshold
+            false_negative = (1.0 - collision(above, bands, rows)).mean() * (1.0 - threshold)
+            error = (1.0 - false_negative_weight) * false_positive + false_negative_weight * false_negative
+            if error < best_error:
+                best, best_error = (bands, rows), error
+    return best
+
+
+class NearDuplicateIndex:
+    """MinHash signatures over word shingles with an on-disk LSH index.
+
+    Each signature is split into bands; documents that agree on every row of at
+    least one band share a bucket row in SQLite. A lookup is one indexed query per
+    band plus a signature comparison for the few colliding documents, so it stays
+    well under a millisecond regardless of how many CVs are indexed.
+    """
+
+    def __init__(self, path: str, threshold: float = 0.85, num_perm: int = 128, shingle_size: int = 3):
+        self.path = path
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = _lsh_params(threshold, num_perm)
+
+        # Fixed seed: signatures are persisted, so every process must use the same permutations
+        rng = np.random.RandomState(1)
+        self._a = rng.randint(1, int(_PRIME), size=num_perm, dtype=np.int64).astype(np.uint64)
+        self._b = rng.randint(0, int(_PRIME), size=num_perm, dtype=np.int64).astype(np.uint64)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_id TEXT PRIMARY KEY,
+                canonical_id TEXT,
+                filename TEXT,
+                signature BLOB
+            );
+            CREATE TABLE IF NOT EXISTS buckets (
+                band INTEGER,
+                bucket INTEGER,
+                doc_id TEXT
+            );
+            CREATE INDEX IF NOT EXISTS buckets_lookup ON buckets (band, bucket);
+        """)
+        logger.info(f"Near-duplicate index at {path} ({self.bands} bands x {self.rows} rows)")
+
+    def signature(self, text: str) -> np.ndarray:
+        """Compute the MinHash signature of a document's word shingles"""
+        words = re.findall(r"\w+", text.lower())
+        size = min(self.shingle_size, len(words)) or 1
+        shingles = {" ".join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        ) % _PRIME
+        # One row per permutation, min over all shingles
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _PRIME
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _buckets(self, signature: np.ndarray):
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            yield band, int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), "little", signed=True)
+
+    def find_duplicate(self, signature: np.ndarray, exclude: str = None) -> Optional[DuplicateMatch]:
+        """Return the most similar indexed document at or above the threshold, if any.
+
+        exclude skips one document, so a CV being re-ingested doesn't match itself.
+        """
+        best = None
+        seen = {exclude}
+        with self._lock:
+            for band, bucket in self._buckets(signature):
+                rows = self._db.execute(
+                    "SELECT d.doc_id, d.canonical_id, d.filename, d.signature FROM buckets b "
+                    "JOIN documents d ON d.doc_id = b.doc_id WHERE b.band = ? AND b.bucket = ?",
+                    (band, bucket)
+                ).fetchall()
+                for doc_id, canonical_id, filename, blob in rows:
+                    if doc_id in seen:
+                        continue
+                    seen.add(doc_id)
+                    similarity = float(np.mean(np.frombuffer(blob, dtype=np.uint32) == signature))
+                    if similarity >= self.threshold and (best is None or similarity > best.similarity):
+                        best = DuplicateMatch(doc_id, canonical_id or doc_id, filename, similarity)
+        return best
+
+    def add(self, doc_id: str, filename: str, signature: np.ndarray, canonical_id: str = None) -> None:
+        """Index a stored document's signature, replacing any previous entry for it"""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM buckets WHERE doc_id = ?", (doc_id,))
+            self._db.execute(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?)",
+                (doc_id, canonical_id, filename, signature.astype(np.uint32).tobytes())
+            )
+            self._db.executemany(
+                "INSERT INTO buckets VALUES (?, ?, ?)",
+                [(band, bucket, doc_id) for band, bucket in self._buckets(signature)]
+            )
+
+    def get(self, doc_id: str) -> Optional[Tuple[Optional[str], np.ndarray]]:
+        """Return (canonical id, signature) of an indexed document, if present"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT canonical_id, signature FROM documents WHERE doc_id = ?", (doc_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], np.frombuffer(row[1], dtype=np.uint32)
+
+    def remove(self, doc_id: str) -> None:
+        """Drop a document from the index"""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM buckets WHERE doc_id = ?", (doc_id,))
+            self._db.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+
+    def clear(self) -> None:
+        """Drop every indexed document"""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM buckets")
+            self._db.execute("DELETE FROM documents")
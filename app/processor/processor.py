@@ -4,15 +4,26 @@ warnings.filterwarnings('ignore', category=DeprecationWarning)
 
 import os
 import weaviate
+from weaviate import Tenant, TenantActivityStatus
+from weaviate.util import generate_uuid5
 import PyPDF2  # Changed from pypdf to PyPDF2
 from tqdm import tqdm
-from typing import List, Dict, Optional, Callable
+from typing import BinaryIO, Iterator, List, Dict, Optional, Callable, Tuple
 import time
 import re
-import glob
 import sys
+import tarfile
+import zipfile
 import logging
+import threading
 import config
+from processor.aggregates import SkillAggregates, epoch_day
+from processor.aliases import index_aliases
+from processor.archive import ArchiveLimitExceeded, is_archive, iter_archive_members
+from processor.cache import search_cache
+from processor.dedup import NearDuplicateIndex
+from processor.scanner import iter_cv_files
+from processor import startup
 
 # Configure logging
 logging.basicConfig(
@@ -21,18 +32,169 @@ logging.basicConfig(
 )
 logger = logging.getLogger('CV_Processor')
 
+# Requisition names become Weaviate tenants and CV_DIR subdirectories. Rebuilds add
+# "_v<timestamp>" (12 characters) and must stay within Weaviate's 64-character limit.
+PARTITION_NAME = re.compile(r"^[A-Za-z0-9_-]{1,52}$")
+REBUILD_TARGET = re.compile(r"_v\d{10}$")
+
+_clients: Dict[str, weaviate.Client] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(weaviate_url: str = None) -> weaviate.Client:
+    """Return the process-wide Weaviate client for a URL.
+
+    Sharing one client keeps its pooled keep-alive HTTP session warm across
+    processors, analyzers and Streamlit reruns instead of reconnecting each time.
+    The first call waits for Weaviate (and the transformer service) to be ready.
+    """
+    url = weaviate_url or config.WEAVIATE_URL
+    with _clients_lock:
+        if url not in _clients:
+            startup.wait_for_dependencies(url)
+            _clients[url] = weaviate.Client(
+                url,
+                startup_period=None,  # Readiness was probed above, with backoff
+                timeout_config=(config.WEAVIATE_CONNECT_TIMEOUT, config.WEAVIATE_READ_TIMEOUT),
+                additional_config=weaviate.Config(
+                    connection_config=weaviate.ConnectionConfig(
+                        session_pool_connections=config.WEAVIATE_POOL_SIZE,
+                        session_pool_maxsize=config.WEAVIATE_POOL_SIZE
+                    )
+                )
+            )
+        return _clients[url]
+
+def is_valid_partition(name: Optional[str]) -> bool:
+    return bool(name and PARTITION_NAME.match(name))
+
+def list_requisitions(client: weaviate.Client) -> List[str]:
+    """Names of the requisitions that exist, whether or not they have been rebuilt"""
+    if not config.MULTI_TENANCY:
+        return []
+    aliases = index_aliases.aliases()
+    requisitions = {logical.partition("/")[2] for logical in aliases if logical.startswith("CV/")}
+    served = set(aliases.values())
+    for tenant in client.schema.get_class_tenants("CV"):
+        # Rebuild targets (serving or in progress) are reached through their requisition
+        if tenant.name not in served and not REBUILD_TARGET.search(tenant.name):
+            requisitions.add(tenant.name)
+    return sorted(requisitions)
+
+def index_file_paths(class_name: str, tenant: Optional[str]) -> Dict[str, str]:
+    """Paths of the local side indexes belonging to one physical class or tenant"""
+    name = tenant or ("default" if class_name == "CV" else class_name)
+    return {
+        "dedup": os.path.join(config.INDEX_DIR, f"dedup_{name}.sqlite3"),
+        "aggregates": os.path.join(config.INDEX_DIR, f"aggregates_{name}.npz")
+    }
+
 class CVProcessor:
-    def __init__(self, weaviate_url: str = None):
-        """Initialize the CV processor with Weaviate client"""
+    def __init__(self, weaviate_url: str = None, tenant: str = None, target: str = None):
+        """Initialize the CV processor with Weaviate client.
+
+        When multi-tenancy is enabled every read and write is scoped to one
+        tenant (a hiring campaign or requisition), defaulting to DEFAULT_TENANT.
+        The physical class (or tenant) behind it is looked up in the index
+        aliases on every call, so a finished rebuild is picked up without a
+        restart; pass target to pin the processor to one physical index instead.
+        """
         try:
-            self.client = weaviate.Client(weaviate_url or config.WEAVIATE_URL)
-            logger.info(f"Connected to Weaviate at {weaviate_url or config.WEAVIATE_URL}")
+            self.weaviate_url = weaviate_url or config.WEAVIATE_URL
+            self.client = get_client(self.weaviate_url)
+            logger.info(f"Connected to Weaviate at {self.weaviate_url}")
+            self.partition = (tenant or config.DEFAULT_TENANT) if config.MULTI_TENANCY else None
+            if self.partition and not is_valid_partition(self.partition):
+                raise ValueError(
+                    f"Invalid requisition name {self.partition!r}: use 1-52 letters, digits, '-' or '_'"
+                )
+            self._target = target
+            self._dedup_indexes: Dict[tuple, NearDuplicateIndex] = {}
+            self._aggregate_stores: Dict[tuple, SkillAggregates] = {}
             self._ensure_schema()
+            if self.tenant:
+                self.ensure_partition(self.tenant)
+            startup.warm_up(self)
             self.__init_tech_skills()
         except Exception as e:
             logger.error(f"Failed to initialize CVProcessor: {str(e)}")
             raise
 
+    @property
+    def logical_name(self) -> str:
+        """Alias under which this processor's index is published"""
+        return f"CV/{self.partition}" if self.partition else "CV"
+
+    @property
+    def class_name(self) -> str:
+        """Physical Weaviate class currently serving this processor"""
+        if config.MULTI_TENANCY:
+            return "CV"
+        return self._target or index_aliases.resolve(self.logical_name)
+
+    @property
+    def tenant(self) -> Optional[str]:
+        """Physical tenant currently serving this processor's partition"""
+        if not self.partition:
+            return None
+        return self._target or index_aliases.resolve(self.logical_name)
+
+    @property
+    def cv_directory(self) -> str:
+        """Directory this processor's CVs are uploaded to: a subdirectory of CV_DIR per requisition"""
+        return os.path.join(config.CV_DIR, self.partition) if self.partition else config.CV_DIR
+
+    def live_index(self) -> Tuple[str, Optional[str]]:
+        """(class, tenant) the alias currently serves, even for a processor pinned to a rebuild target"""
+        physical = index_aliases.resolve(self.logical_name)
+        return ("CV", physical) if config.MULTI_TENANCY else (physical, None)
+
+    def _ingested_at(self, uuid: str, existing: Optional[dict]) -> str:
+        """Original ingest date of a CV, so re-ingests and rebuilds keep it in its day bucket"""
+        if existing:
+            ingested_at = existing.get('properties', {}).get('ingestedAt')
+            if ingested_at:
+                return ingested_at
+        if self._target:
+            # A rebuild carries the date over from the index it replaces
+            class_name, tenant = self.live_index()
+            try:
+                previous = self.client.data_object.get_by_id(uuid, class_name=class_name, tenant=tenant)
+                if previous and previous.get('properties', {}).get('ingestedAt'):
+                    return previous['properties']['ingestedAt']
+            except Exception as e:
+                logger.debug(f"No previous ingest date for {uuid}: {str(e)}")
+        return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+    @property
+    def dedup(self) -> Optional[NearDuplicateIndex]:
+        """Near-duplicate index of the physical class or tenant currently served"""
+        if config.DEDUP_MODE == "off":
+            return None
+        key = (self.class_name, self.tenant)
+        if key not in self._dedup_indexes:
+            self._dedup_indexes[key] = NearDuplicateIndex(
+                index_file_paths(*key)["dedup"],
+                threshold=config.DEDUP_THRESHOLD,
+                num_perm=config.DEDUP_NUM_PERM,
+                shingle_size=config.DEDUP_SHINGLE_SIZE
+            )
+        return self._dedup_indexes[key]
+
+    @property
+    def aggregates(self) -> SkillAggregates:
+        """Skill analytics aggregates of the physical class or tenant currently served"""
+        key = (self.class_name, self.tenant)
+        if key not in self._aggregate_stores:
+            self._aggregate_stores[key] = SkillAggregates(index_file_paths(*key)["aggregates"])
+        return self._aggregate_stores[key]
+
+    @staticmethod
+    def get_objects(results: Optional[dict]) -> List[dict]:
+        """Return the objects of a Get query result, whichever physical class served it"""
+        objects = (results or {}).get('data', {}).get('Get') or {}
+        return next(iter(objects.values()), None) or []
+
     def __init_tech_skills(self):
         """Initialize the dictionary of tech skills and their variations"""
         self.tech_skills = {
@@ -59,78 +221,120 @@ class CVProcessor:
         }
 
     def _ensure_schema(self):
-        """Ensure the Weaviate schema exists"""
+        """Ensure the Weaviate schema exists, once per class and process"""
+        schema_key = ("schema", self.weaviate_url, self.class_name)
+        if not startup.once(schema_key):
+            return
+        started = time.monotonic()
         try:
             # Check if schema exists
             schema = self.client.schema.get()
             logger.info(f"Current schema: {schema}")
             
-            class_name = "CV"
+            class_name = self.class_name
             
-            # Only create schema if it doesn't exist
-            if not any(cls['class'] == class_name for cls in schema.get('classes', [])):
-                logger.info(f"Creating new {class_name} schema")
-                # Create schema
-                class_obj = {
-                    "class": class_name,
-                    "description": "A CV document",
-                    "vectorizer": "text2vec-transformers",
-                    "moduleConfig": {
-                        "text2vec-transformers": {
-                            "vectorizeClassName": False,
-                            "model": "sentence-transformers/all-MiniLM-L6-v2",
-                            "options": {
-                                "waitForModel": True
+            existing = next((cls for cls in schema.get('classes', []) if cls['class'] == class_name), None)
+            if existing and bool(existing.get('multiTenancyConfig', {}).get('enabled')) != config.MULTI_TENANCY:
+                raise ValueError(
+                    f"{class_name} class multi-tenancy does not match CV_MULTI_TENANCY={config.MULTI_TENANCY}; "
+                    "clear the class or change the setting"
+                )
+
+            # Desired schema
+            class_obj = {
+                "class": class_name,
+                "description": "A CV document",
+                "vectorizer": "text2vec-transformers",
+                "multiTenancyConfig": {"enabled": config.MULTI_TENANCY},
+                "moduleConfig": {
+                    "text2vec-transformers": {
+                        "vectorizeClassName": False,
+                        "model": "sentence-transformers/all-MiniLM-L6-v2",
+                        "options": {
+                            "waitForModel": True
+                        }
+                    }
+                },
+                "properties": [
+                    {
+                        "name": "content",
+                        "dataType": ["text"],
+                        "description": "The text content of the CV",
+                        "moduleConfig": {
+                            "text2vec-transformers": {
+                                "skip": False,
+                                "vectorizePropertyName": False
+                            }
+                        }
+                    },
+                    {
+                        "name": "skills",
+                        "dataType": ["text[]"],
+                        "description": "List of skills found in the CV",
+                        "moduleConfig": {
+                            "text2vec-transformers": {
+                                "skip": True,
+                                "vectorizePropertyName": False
                             }
                         }
                     },
-                    "properties": [
-                        {
-                            "name": "content",
-                            "dataType": ["text"],
-                            "description": "The text content of the CV",
-                            "moduleConfig": {
-                                "text2vec-transformers": {
-                                    "skip": False,
-                                    "vectorizePropertyName": False
-                                }
+                    {
+                        "name": "filename",
+                        "dataType": ["text"],
+                        "description": "Name of the CV file",
+                        "moduleConfig": {
+                            "text2vec-transformers": {
+                                "skip": True,
+                                "vectorizePropertyName": False
                             }
-                        },
-                        {
-                            "name": "skills",
-                            "dataType": ["text[]"],
-                            "description": "List of skills found in the CV",
-                            "moduleConfig": {
-                                "text2vec-transformers": {
-                                    "skip": True,
-                                    "vectorizePropertyName": False
-                                }
+                        }
+                    },
+                    {
+                        "name": "duplicateOf",
+                        "dataType": ["text"],
+                        "description": "ID of the canonical CV this one is a near-duplicate of",
+                        "moduleConfig": {
+                            "text2vec-transformers": {
+                                "skip": True,
+                                "vectorizePropertyName": False
                             }
-                        },
-                        {
-                            "name": "filename",
-                            "dataType": ["text"],
-                            "description": "Name of the CV file",
-                            "moduleConfig": {
-                                "text2vec-transformers": {
-                                    "skip": True,
-                                    "vectorizePropertyName": False
-                                }
+                        }
+                    },
+                    {
+                        "name": "ingestedAt",
+                        "dataType": ["date"],
+                        "description": "When the CV was stored",
+                        "moduleConfig": {
+                            "text2vec-transformers": {
+                                "skip": True,
+                                "vectorizePropertyName": False
                             }
                         }
-                    ]
-                }
-                
+                    }
+                ]
+            }
+
+            # Only create schema if it doesn't exist
+            if not existing:
+                logger.info(f"Creating new {class_name} schema")
                 self.client.schema.create_class(class_obj)
-                logger.info("Created CV schema in Weaviate")
+                logger.info(f"Created {class_name} schema in Weaviate")
                 
                 # Verify schema was created
                 new_schema = self.client.schema.get()
                 logger.info(f"Updated schema: {new_schema}")
             else:
                 logger.info(f"{class_name} schema already exists")
+                # Add properties introduced after the class was created
+                existing_properties = {prop['name'] for prop in existing.get('properties', [])}
+                for prop in class_obj['properties']:
+                    if prop['name'] not in existing_properties:
+                        self.client.schema.property.create(class_name, prop)
+                        logger.info(f"Added {prop['name']} property to {class_name} schema")
+            startup.record_timing(f"schema:{class_name}", time.monotonic() - started)
             
         except Exception as e:
+            startup.forget(schema_key)
             logger.error(f"Failed to ensure schema: {str(e)}")
             raise
 
@@ -138,15 +342,23 @@ class CVProcessor:
         """Extract text content from a PDF file"""
         try:
             with open(pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
-                return text.strip()
+                return self.extract_text_from_stream(file, pdf_path)
         except Exception as e:
             logger.error(f"Failed to extract text from {pdf_path}: {str(e)}")
             return None
 
+    def extract_text_from_stream(self, stream: BinaryIO, name: str) -> Optional[str]:
+        """Extract text content from a binary PDF stream"""
+        try:
+            reader = PyPDF2.PdfReader(stream)
+            text = ""
+            for page in reader.pages:
+                text += page.extract_text() + "\n"
+            return text.strip()
+        except Exception as e:
+            logger.error(f"Failed to extract text from {name}: {str(e)}")
+            return None
+
     def extract_skills(self, text: str) -> List[str]:
         """Extract skills from text"""
         try:
@@ -217,112 +429,338 @@ class CVProcessor:
             logger.error(f"Failed to extract skills: {str(e)}")
             return []
 
-    def process_directory(self, directory_path: str, progress_callback: Callable[[float], None] = None) -> None:
-        """Process all PDFs in a directory"""
+    def ingest_document(self, text: Optional[str], filename: str) -> bool:
+        """Extract skills from CV text and store it in Weaviate.
+
+        The object ID is derived from filename (the CV's path, or
+        "<archive>/<member>"), so ingesting the same file again replaces its object.
+        Returns False when there is nothing to store; raises if storing fails.
+        """
+        if not text:
+            logger.warning(f"No text extracted from {filename}")
+            return False
+        logger.info(f"Successfully extracted text from {filename}")
+
+        # Extract skills
+        skills = self.extract_skills(text)
+        logger.info(f"Found skills in {filename}: {skills}")
+
+        # Create data object
+        properties = {
+            "content": text,
+            "skills": skills,
+            "filename": filename
+        }
+
+        uuid = generate_uuid5(filename)
+        existing = self.client.data_object.get_by_id(uuid, class_name=self.class_name, tenant=self.tenant)
+        properties["ingestedAt"] = self._ingested_at(uuid, existing)
+
+        # Check for near-duplicates of CVs already stored
+        signature = None
+        duplicate = None
+        dedup = self.dedup
+        if dedup:
+            signature = dedup.signature(text)
+            duplicate = dedup.find_duplicate(signature, exclude=uuid)
+            if duplicate:
+                logger.info(f"{filename} is a near-duplicate of {duplicate.filename} (similarity {duplicate.similarity:.2f})")
+                if config.DEDUP_MODE == "skip":
+                    return False
+                properties["duplicateOf"] = duplicate.canonical_id
+
+        # Store in Weaviate
+        try:
+            if existing:
+                self.client.data_object.replace(
+                    data_object=properties,
+                    class_name=self.class_name,
+                    uuid=uuid,
+                    tenant=self.tenant
+                )
+            else:
+                self.client.data_object.create(
+                    class_name=self.class_name,
+                    data_object=properties,
+                    uuid=uuid,
+                    tenant=self.tenant
+                )
+            logger.info(f"Successfully stored {filename} in Weaviate")
+            if dedup:
+                dedup.add(uuid, filename, signature, duplicate.canonical_id if duplicate else None)
+            replaces = None
+            if existing:
+                previous = existing.get('properties', {})
+                replaces = (
+                    previous.get('skills') or [],
+                    epoch_day(previous['ingestedAt']) if previous.get('ingestedAt') else None
+                )
+            self.aggregates.add(skills, epoch_day(properties["ingestedAt"]), replaces=replaces)
+            # Nobody reads a pinned rebuild target until it is switched in
+            if not self._target:
+                search_cache.bump_generation()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to store {filename} in Weaviate: {str(e)}")
+            raise
+
+    def process_archive(self, archive_path: str, source: str = None, strict: bool = False) -> int:
+        """Stream every PDF inside a zip/tar archive into Weaviate without unpacking it.
+
+        A CV that fails to store is logged and skipped, unless strict is set.
+        """
+        stored = 0
+        source = source or os.path.basename(archive_path)
+        try:
+            for member_name, stream in iter_archive_members(archive_path):
+                try:
+                    text = self.extract_text_from_stream(stream, member_name)
+                    if self.ingest_document(text, f"{source}/{member_name}"):
+                        stored += 1
+                except Exception as e:
+                    logger.error(f"Failed to process {member_name} from {archive_path}: {str(e)}")
+                    if strict:
+                        raise
+                finally:
+                    stream.close()
+        except ArchiveLimitExceeded as e:
+            logger.error(f"Aborted archive {archive_path}: {str(e)}")
+        except (zipfile.BadZipFile, tarfile.TarError) as e:
+            logger.error(f"Failed to read archive {archive_path}: {str(e)}")
+        logger.info(f"Stored {stored} CVs from archive {os.path.basename(archive_path)}")
+        return stored
+
+    def process_file(self, file_path: str, filename: str = None, strict: bool = False) -> int:
+        """Ingest a single PDF or CV archive without clearing existing data.
+
+        Returns the number of CVs stored. Failures are logged and count as 0,
+        unless strict is set, in which case they are raised.
+        """
+        try:
+            if is_archive(file_path):
+                return self.process_archive(file_path, filename, strict=strict)
+            text = self.extract_text_from_pdf(file_path)
+            return int(self.ingest_document(text, filename or os.path.basename(file_path)))
+        except Exception as e:
+            logger.error(f"Failed to process {file_path}: {str(e)}")
+            if strict:
+                raise
+            return 0
+
+    def scan_directory(self, directory_path: str, shard_index: int = None, shard_count: int = None,
+                       modified_after: float = None) -> Iterator[str]:
+        """Lazily yield the CV files and archives under a directory that belong to this shard"""
+        return iter_cv_files(
+            directory_path,
+            extensions={".pdf"} | config.ARCHIVE_EXTENSIONS,
+            min_size=config.SCAN_MIN_SIZE,
+            max_size=config.SCAN_MAX_SIZE,
+            modified_after=config.SCAN_MODIFIED_AFTER if modified_after is None else modified_after,
+            shard_index=config.PROCESSOR_SHARD_INDEX if shard_index is None else shard_index,
+            shard_count=config.PROCESSOR_SHARD_COUNT if shard_count is None else shard_count
+        )
+
+    def process_directory(self, directory_path: str, progress_callback: Callable[[float], None] = None,
+                          shard_index: int = None, shard_count: int = None,
+                          modified_after: float = None) -> None:
+        """Process all PDFs and CV archives under a directory tree"""
         try:
-            # Get list of PDF files
-            pdf_files = glob.glob(os.path.join(directory_path, "*.pdf"))
+            shard_count = config.PROCESSOR_SHARD_COUNT if shard_count is None else shard_count
+            shard_index = config.PROCESSOR_SHARD_INDEX if shard_index is None else shard_index
             logger.info(f"Directory path: {directory_path}")
             logger.info(f"Directory exists: {os.path.exists(directory_path)}")
-            logger.info(f"Directory contents: {os.listdir(directory_path)}")
-            logger.info(f"Found PDF files: {pdf_files}")
-            
-            if not pdf_files:
-                logger.warning(f"No PDF files found in {directory_path}")
+            logger.info(f"Scanning as shard {shard_index + 1}/{shard_count}")
+
+            def scan():
+                return self.scan_directory(directory_path, shard_index, shard_count, modified_after)
+
+            # Progress needs a total, so count with a cheap first pass only when someone is watching
+            total = sum(1 for _ in scan()) if progress_callback else None
+            if total == 0:
+                logger.warning(f"No PDF files or archives found in {directory_path}")
                 return
-                
-            logger.info(f"Found {len(pdf_files)} PDF files")
-            
-            # Clear existing data
-            self.clear_database()
-            logger.info("Cleared existing database")
-            
-            # Process each PDF
-            for i, pdf_file in enumerate(pdf_files):
-                try:
-                    # Update progress
-                    if progress_callback:
-                        progress = float(i) / len(pdf_files)
-                        progress_callback(progress)
-                        logger.info(f"Processing file {i+1}/{len(pdf_files)}: {os.path.basename(pdf_file)} (Progress: {progress*100:.1f}%)")
-
-                    # Extract text from PDF
-                    text = self.extract_text_from_pdf(pdf_file)
-                    if not text:
-                        logger.warning(f"No text extracted from {pdf_file}")
-                        continue
-                    logger.info(f"Successfully extracted text from {os.path.basename(pdf_file)}")
-                        
-                    # Extract skills
-                    skills = self.extract_skills(text)
-                    logger.info(f"Found skills in {os.path.basename(pdf_file)}: {skills}")
-                    
-                    # Create data object
-                    properties = {
-                        "content": text,
-                        "skills": skills,
-                        "filename": os.path.basename(pdf_file)
-                    }
-                    
-                    # Store in Weaviate
+            if total:
+                logger.info(f"Found {total} PDF files and archives")
+
+            # Clear existing data. With several shards ingesting side by side a clear
+            # from any one of them would wipe the others' work, so it is skipped.
+            if shard_count == 1:
+                self.clear_database()
+                logger.info("Cleared existing database")
+            else:
+                logger.info("Sharded run, keeping existing data")
+
+            # Process each PDF or archive as the walker finds it
+            processed = 0
+            with self.aggregates.batch(config.AGGREGATES_FLUSH_EVERY):
+                for cv_file in scan():
+                    filename = os.path.relpath(cv_file, directory_path).replace(os.sep, "/")
                     try:
-                        self.client.data_object.create(
-                            class_name="CV",
-                            data_object=properties
-                        )
-                        logger.info(f"Successfully stored {os.path.basename(pdf_file)} in Weaviate")
+                        # Update progress
+                        if progress_callback:
+                            progress = min(float(processed) / total, 1.0)
+                            progress_callback(progress)
+                            logger.info(f"Processing file {processed+1}/{total}: {filename} (Progress: {progress*100:.1f}%)")
+                        else:
+                            logger.debug(f"Processing file {processed+1}: {filename}")
+
+                        if is_archive(cv_file):
+                            self.process_archive(cv_file, filename)
+                            continue
+
+                        # Extract text from PDF and store it
+                        text = self.extract_text_from_pdf(cv_file)
+                        self.ingest_document(text, filename)
+
                     except Exception as e:
-                        logger.error(f"Failed to store {pdf_file} in Weaviate: {str(e)}")
+                        logger.error(f"Failed to process {cv_file}: {str(e)}")
                         continue
-                        
-                except Exception as e:
-                    logger.error(f"Failed to process {pdf_file}: {str(e)}")
-                    continue
+                    finally:
+                        processed += 1
+
+            if processed == 0:
+                logger.warning(f"No PDF files or archives found in {directory_path}")
+                return
 
             # Update final progress
             if progress_callback:
                 progress_callback(1.0)
-                logger.info("Finished processing all files")
-                
+            logger.info(f"Finished processing {processed} files")
+
             # Verify data was stored
             try:
-                results = (
-                    self.client.query
-                    .get("CV", ["filename"])
-                    .do()
-                )
-                if results and 'data' in results and 'Get' in results['data'] and 'CV' in results['data']['Get']:
-                    stored_files = [cv['filename'] for cv in results['data']['Get']['CV']]
-                    logger.info(f"Successfully stored {len(stored_files)} CVs: {stored_files}")
+                stored_count = self.get_cv_count()
+                if stored_count:
+                    logger.info(f"Database now holds {stored_count} CVs")
                 else:
                     logger.warning("No CVs found in database after processing!")
             except Exception as e:
                 logger.error(f"Failed to verify stored data: {str(e)}")
-                
+
         except Exception as e:
             logger.error(f"Failed to process directory: {str(e)}")
             raise
 
+    def query_get(self, properties: List[str]):
+        """Start a Get query on the CV class scoped to this processor's tenant"""
+        query = self.client.query.get(self.class_name, properties)
+        return query.with_tenant(self.tenant) if self.tenant else query
+
+    def query_aggregate(self):
+        """Start an Aggregate query on the CV class scoped to this processor's tenant"""
+        query = self.client.query.aggregate(self.class_name)
+        return query.with_tenant(self.tenant) if self.tenant else query
+
+    def iter_objects(self, properties: List[str], additional: List[str] = None,
+                     page_size: int = 500) -> Iterator[dict]:
+        """Stream every CV in this processor's partition using Weaviate's cursor API"""
+        additional = ["id"] + [field for field in additional or [] if field != "id"]
+        after = None
+        while True:
+            query = self.query_get(properties).with_additional(additional).with_limit(page_size)
+            if after:
+                query = query.with_after(after)
+            results = query.do()
+            if 'errors' in results:
+                raise RuntimeError(results['errors'])
+            page = self.get_objects(results)
+            if not page:
+                return
+            yield from page
+            after = page[-1]['_additional']['id']
+
+    def get_cv_count(self) -> int:
+        """Count the CVs in this processor's partition"""
+        results = self.query_aggregate().with_meta_count().do()
+        if 'errors' in (results or {}):
+            raise RuntimeError(results['errors'])
+        aggregates = (results or {}).get('data', {}).get('Aggregate') or {}
+        groups = next(iter(aggregates.values()), None)
+        if groups:
+            return groups[0]['meta']['count']
+        return 0
+
+    def list_partitions(self) -> Dict[str, str]:
+        """Return every tenant of the CV class with its activity status"""
+        if not config.MULTI_TENANCY:
+            return {}
+        return {
+            tenant.name: tenant.activity_status.value
+            for tenant in self.client.schema.get_class_tenants("CV")
+        }
+
+    def ensure_partition(self, tenant: str) -> None:
+        """Create a tenant if it doesn't exist yet and make sure it is loaded"""
+        try:
+            status = self.list_partitions().get(tenant)
+            if status is None:
+                self.client.schema.add_class_tenants("CV", [Tenant(name=tenant)])
+                logger.info(f"Created partition {tenant}")
+            elif status != TenantActivityStatus.HOT.value:
+                self.activate_partition(tenant)
+        except Exception as e:
+            logger.error(f"Failed to ensure partition {tenant}: {str(e)}")
+            raise
+
+    def activate_partition(self, tenant: str) -> None:
+        """Load an offloaded tenant back so it can be queried and written"""
+        self.client.schema.update_class_tenants(
+            "CV", [Tenant(name=tenant, activity_status=TenantActivityStatus.HOT)]
+        )
+        logger.info(f"Activated partition {tenant}")
+
+    def offload_partition(self, tenant: str) -> None:
+        """Mark an inactive tenant cold so Weaviate releases its memory and file handles"""
+        try:
+            self.client.schema.update_class_tenants(
+                "CV", [Tenant(name=tenant, activity_status=TenantActivityStatus.COLD)]
+            )
+            logger.info(f"Offloaded partition {tenant}")
+        except Exception as e:
+            logger.error(f"Failed to offload partition {tenant}: {str(e)}")
+            raise
+
     def clear_database(self) -> None:
-        """Clear all objects from the database"""
+        """Clear all objects from the database, or only this processor's partition"""
         try:
+            tenant = self.tenant
+            dedup = self.dedup
+            if tenant:
+                # Dropping and re-creating the tenant discards its shard in one step
+                self.client.schema.remove_class_tenants("CV", [tenant])
+                self.client.schema.add_class_tenants("CV", [Tenant(name=tenant)])
+                if dedup:
+                    dedup.clear()
+                self.aggregates.clear()
+                search_cache.bump_generation()
+                logger.info(f"Cleared partition {tenant}")
+                return
+
             # First get all objects
+            class_name = self.class_name
             result = self.client.query.get(
-                "CV",
-                ["_additional {id}"]
+                class_name,
+                ["skills", "ingestedAt", "_additional {id}"]
             ).do()
 
-            if result and 'data' in result and 'Get' in result['data'] and 'CV' in result['data']['Get']:
-                objects = result['data']['Get']['CV']
-                
+            objects = self.get_objects(result)
+            if objects:
                 # Delete each object
-                for obj in objects:
-                    if '_additional' in obj and 'id' in obj['_additional']:
-                        self.client.data_object.delete(
-                            class_name="CV",
-                            uuid=obj['_additional']['id']
-                        )
+                with self.aggregates.batch(config.AGGREGATES_FLUSH_EVERY):
+                    for obj in objects:
+                        if '_additional' in obj and 'id' in obj['_additional']:
+                            self.client.data_object.delete(
+                                class_name=class_name,
+                                uuid=obj['_additional']['id']
+                            )
+                            if dedup:
+                                dedup.remove(obj['_additional']['id'])
+                            self.aggregates.remove(
+                                obj.get('skills') or [],
+                                epoch_day(obj['ingestedAt']) if obj.get('ingestedAt') else None
+                            )
                 
+                search_cache.bump_generation()
                 logger.info(f"Cleared {len(objects)} objects from database")
             else:
                 logger.info("No objects found to clear")
@@ -332,10 +770,33 @@ class CVProcessor:
             raise
 
 if __name__ == "__main__":
+    from processor.rebuild import RebuildAlreadyRunning, RebuildVerificationError, rebuild_index
+
+    # Waits for Weaviate and the transformer service, then warms up the model
     processor = CVProcessor()
-    
-    # Wait for Weaviate to be ready
-    time.sleep(5)
-    
-    # Process CVs
-    processor.process_directory("data/cv")
+    logger.info(f"Startup timings: {startup.get_startup_timings()}")
+
+    # With multi-tenancy every requisition's CVs live in their own subdirectory
+    tenants = [None]
+    if config.MULTI_TENANCY:
+        tenants = sorted(
+            name for name in os.listdir(config.CV_DIR)
+            if os.path.isdir(os.path.join(config.CV_DIR, name)) and not name.startswith(".")
+        )
+        logger.info(f"Requisitions with CVs: {tenants}")
+
+    # Process CVs. A rebuild keeps the current index serving until the new one is
+    # verified; sharded runs ingest side by side into the live index instead.
+    for tenant in tenants:
+        try:
+            processor = CVProcessor(tenant=tenant)
+            if config.PROCESSOR_MODE == "rebuild" and config.PROCESSOR_SHARD_COUNT == 1:
+                rebuild_index(processor.cv_directory, tenant=tenant)
+            else:
+                processor.process_directory(processor.cv_directory)
+        except RebuildAlreadyRunning as e:
+            logger.warning(f"Skipping rebuild: {str(e)}")
+        except RebuildVerificationError as e:
+            logger.error(f"Rebuild not switched in: {str(e)}")
+        except Exception as e:
+            logger.error(f"Failed to process CVs of requisition {tenant}: {str(e)}")
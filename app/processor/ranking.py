@@ -0,0 +1,200 @@
+import json
+import base64
+import bisect
+import hashlib
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import config
+from processor.cache import search_cache
+
+logger = logging.getLogger('CV_Processor')
+
+# (object id, score, matching skills)
+RankedEntry = Tuple[str, float, Tuple[str, ...]]
+
+
+class CandidateRanker:
+    """Weighted skill scoring with exact top-k and stable cursor pagination.
+
+    Each query streams only the lightweight fields (id and skills) of every CV
+    through Weaviate's cursor API, which has no result window, scores every
+    match (fetching its vector distance when blending), and caches the complete
+    ranking under the search cache generation. Pages are slices of that ranking,
+    so browsing never re-fetches or re-sorts, and only the CVs on the requested
+    page are loaded in full. Cursors hold the (score, id) of the last CV shown, so
+    a page still starts right after it when the index changed and the ranking
+    had to be rebuilt in between.
+    """
+
+    def __init__(self, processor):
+        self.processor = processor
+
+    @staticmethod
+    def _query_key(weights: Dict[str, float], must_have: List[str], query: Optional[str], alpha: float) -> tuple:
+        return (
+            "rank",
+            tuple(sorted(weights.items())),
+            tuple(sorted(set(must_have))),
+            (query or "").strip().lower(),
+            round(alpha, 3)
+        )
+
+    @staticmethod
+    def _sort_key(entry: RankedEntry) -> Tuple[float, str]:
+        return -entry[1], entry[0]
+
+    @staticmethod
+    def _encode_cursor(query_digest: str, last: RankedEntry) -> str:
+        payload = json.dumps({"q": query_digest, "s": last[1], "i": last[0]}).encode("utf-8")
+        return base64.urlsafe_b64encode(payload).decode("ascii")
+
+    def _decode_cursor(self, cursor: Optional[str], query_digest: str,
+                       ranking: List[RankedEntry]) -> int:
+        """Return where the page after a cursor starts, or 0 if it belongs to another query"""
+        if not cursor:
+            return 0
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            if payload.get("q") != query_digest:
+                return 0
+            last = (-float(payload["s"]), str(payload["i"]))
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed ranking cursor")
+            return 0
+        # First entry ranked after the last one shown, wherever it sits in the current ranking
+        return bisect.bisect_right(ranking, last, key=self._sort_key)
+
+    def _scan(self, weights: Dict[str, float], must_have: List[str]) -> List[dict]:
+        """Fetch id, skills and duplicateOf of every CV with all must_have skills, or any weighted one"""
+        required = set(must_have)
+        wanted = set(weights)
+        matches = []
+        for obj in self.processor.iter_objects(["skills", "duplicateOf"], page_size=config.RANKING_SCAN_PAGE_SIZE):
+            skills = set(obj.get('skills') or [])
+            if (required <= skills) if required else (wanted & skills):
+                matches.append(obj)
+        return matches
+
+    def _distances(self, query: str, doc_ids: List[str]) -> Dict[str, float]:
+        """Vector distance of the query to each of the given CVs, fetched in batches of ids"""
+        distances = {}
+        for start in range(0, len(doc_ids), config.RANKING_DISTANCE_BATCH_SIZE):
+            batch = doc_ids[start:start + config.RANKING_DISTANCE_BATCH_SIZE]
+            id_filter = {
+                "operator": "Or",
+                "operands": [
+                    {"path": ["id"], "operator": "Equal", "valueText": doc_id} for doc_id in batch
+                ]
+            }
+            results = (
+                self.processor.query_get(["_additional { id distance }"])
+                .with_near_text({"concepts": [query]})
+                .with_where(id_filter)
+                .with_limit(len(batch))
+                .do()
+            )
+            if 'errors' in results:
+                raise RuntimeError(results['errors'])
+            for obj in self.processor.get_objects(results):
+                distances[obj['_additional']['id']] = obj['_additional'].get('distance')
+        return distances
+
+    def _build_ranking(self, weights: Dict[str, float], must_have: List[str],
+                       query: Optional[str], alpha: float) -> List[RankedEntry]:
+        """Score every matching CV and sort them, best first"""
+        matches = self._scan(weights, must_have)
+        distances = {}
+        if query and alpha:
+            distances = self._distances(query, [match['_additional']['id'] for match in matches])
+
+        total_weight = sum(max(weight, 0.0) for weight in weights.values()) or 1.0
+        scored = []
+        for match in matches:
+            doc_id = match['_additional']['id']
+            matching = tuple(sorted(set(match.get('skills') or []) & set(weights)))
+            score = sum(weights[skill] for skill in matching) / total_weight
+            if query and alpha:
+                # Cosine distance is in [0, 2]; map it to a similarity in [0, 1]
+                distance = distances.get(doc_id)
+                similarity = 1.0 - distance / 2.0 if distance is not None else 0.0
+                score = (1.0 - alpha) * score + alpha * similarity
+            scored.append(((doc_id, score, matching), match.get('duplicateOf') or doc_id))
+
+        # Ties broken by id so the order, and therefore every page, is deterministic
+        scored.sort(key=lambda item: self._sort_key(item[0]))
+
+        # A near-duplicate group (a canonical CV and the copies linked to it) is
+        # ranked once, as its best-scoring member among the matches
+        ranking = []
+        seen = set()
+        for entry, group in scored:
+            if group not in seen:
+                seen.add(group)
+                ranking.append(entry)
+        return ranking
+
+    def _fetch_page(self, entries: List[RankedEntry]) -> List[dict]:
+        """Load the full CVs for one page of the ranking, in ranking order"""
+        if not entries:
+            return []
+        id_filter = {
+            "operator": "Or",
+            "operands": [
+                {"path": ["id"], "operator": "Equal", "valueText": doc_id} for doc_id, _, _ in entries
+            ]
+        }
+        results = (
+            self.processor.query_get(["content", "skills", "filename", "_additional { id }"])
+            .with_where(id_filter)
+            .with_limit(len(entries))
+            .do()
+        )
+        objects = {
+            obj['_additional']['id']: obj
+            for obj in self.processor.get_objects(results)
+        }
+        page = []
+        for doc_id, score, matching in entries:
+            obj = objects.get(doc_id)
+            if obj is None:
+                continue
+            obj['score'] = score
+            obj['matching_skills'] = list(matching)
+            obj['matching_count'] = len(matching)
+            page.append(obj)
+        return page
+
+    def rank(self, weights: Dict[str, float], must_have: List[str] = None, query: str = None,
+             alpha: float = 0.0, page_size: int = 10, cursor: str = None) -> Dict:
+        """Return one page of candidates ranked by weighted skill score.
+
+        weights maps skills to their weight; must_have skills are required (and
+        count with weight 1.0 unless weighted explicitly). When query is given,
+        alpha blends its vector similarity into the score. Pass the returned
+        next_cursor back to get the following page.
+        """
+        must_have = list(must_have or [])
+        weights = dict(weights)
+        for skill in must_have:
+            weights.setdefault(skill, 1.0)
+        if not weights:
+            return {"candidates": [], "total": 0, "offset": 0, "next_cursor": None}
+
+        key = (self.processor.class_name, self.processor.tenant) + self._query_key(weights, must_have, query, alpha)
+        query_digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:16]
+        ranking = search_cache.get(key)
+        if ranking is None:
+            token = search_cache.token()
+            ranking = self._build_ranking(weights, must_have, query, alpha)
+            search_cache.put(key, ranking, token)
+            logger.info(f"Ranked {len(ranking)} candidates for {sorted(weights)}")
+
+        offset = self._decode_cursor(cursor, query_digest, ranking)
+        entries = ranking[offset:offset + page_size]
+        return {
+            "candidates": self._fetch_page(entries),
+            "total": len(ranking),
+            "offset": offset,
+            "next_cursor": self._encode_cursor(query_digest, entries[-1]) if offset + page_size < len(ranking) else None
+        }
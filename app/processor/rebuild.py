@@ -0,0 +1,249 @@
+import os
+import sys
+import json
+import time
+import fcntl
+import logging
+import argparse
+from typing import Callable, Dict, List, Optional
+
+import config
+from processor.aggregates import recompute_aggregates
+from processor.aliases import index_aliases
+from processor.cache import search_cache
+from processor.processor import CVProcessor, index_file_paths
+
+logger = logging.getLogger('CV_Processor')
+
+
+class RebuildVerificationError(RuntimeError):
+    """The rebuilt index is missing files or CVs, so it was not switched in"""
+
+
+class RebuildAlreadyRunning(RuntimeError):
+    """Another process or session is already rebuilding the same index"""
+
+
+def _checkpoint_paths(logical: str):
+    name = logical.replace("/", "_")
+    base = os.path.join(config.INDEX_DIR, f"rebuild_{name}")
+    return f"{base}.json", f"{base}.log"
+
+
+def _read_log(log_path: str) -> Dict[str, int]:
+    """Return the files already ingested into the target with the number of CVs each stored"""
+    done = {}
+    if not os.path.exists(log_path):
+        return done
+    with open(log_path, encoding="utf-8") as f:
+        for line in f:
+            # A crash can leave a torn last line; that file is simply ingested again
+            filename, sep, stored = line.rstrip("\n").rpartition("\t")
+            if sep and stored.isdigit():
+                done[filename] = int(stored)
+    return done
+
+
+def _remove_checkpoint(checkpoint_path: str, log_path: str) -> None:
+    for path in (checkpoint_path, log_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _physical(target: str):
+    """Return the (class, tenant) pair a rebuild target names"""
+    return ("CV", target) if config.MULTI_TENANCY else (target, None)
+
+
+def _drop_target(client, target: str) -> None:
+    """Delete a physical index and its local side indexes"""
+    class_name, tenant = _physical(target)
+    try:
+        if tenant:
+            client.schema.remove_class_tenants(class_name, [tenant])
+        elif client.schema.exists(class_name):
+            client.schema.delete_class(class_name)
+    except Exception as e:
+        logger.error(f"Failed to drop index {target}: {str(e)}")
+        return
+
+    # Processes still holding the old SQLite file open keep their handle until they move on
+    paths = index_file_paths(class_name, tenant)
+    for path in (paths["dedup"], paths["dedup"] + "-wal", paths["dedup"] + "-shm",
+                 paths["aggregates"], paths["aggregates"] + ".lock"):
+        if os.path.exists(path):
+            os.remove(path)
+    logger.info(f"Dropped index {target}")
+
+
+def _catch_up(builder: CVProcessor, directory_path: str, since: float, strict: bool = True) -> int:
+    """Ingest the files written since a point in time, e.g. CVs uploaded into the live index mid-rebuild"""
+    stored = 0
+    for cv_file in builder.scan_directory(directory_path, shard_index=0, shard_count=1, modified_after=since):
+        filename = os.path.relpath(cv_file, directory_path).replace(os.sep, "/")
+        stored += builder.process_file(cv_file, filename, strict=strict)
+    if stored:
+        logger.info(f"Caught up {stored} CVs written to {directory_path} during the rebuild")
+    return stored
+
+
+def _rebuild(live: CVProcessor, directory_path: str, fresh: bool,
+             progress_callback: Optional[Callable[[float], None]]) -> int:
+    """Body of rebuild_index, run while holding the index's rebuild lock"""
+    logical = live.logical_name
+    checkpoint_path, log_path = _checkpoint_paths(logical)
+    directory_path = os.path.abspath(directory_path)
+
+    checkpoint = None
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if fresh or checkpoint.get("directory") != directory_path:
+            logger.info(f"Discarding unfinished rebuild into {checkpoint['target']}")
+            _drop_target(live.client, checkpoint["target"])
+            checkpoint = None
+
+    if checkpoint is None:
+        version = f"v{int(time.time())}"
+        target = f"{live.partition}_{version}" if live.partition else f"CV_{version}"
+        checkpoint = {"target": target, "directory": directory_path, "started_at": time.time()}
+        if os.path.exists(log_path):
+            os.remove(log_path)
+        tmp_path = f"{checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, checkpoint_path)
+        logger.info(f"Rebuilding {logical} into {target}")
+    else:
+        logger.info(f"Resuming rebuild of {logical} into {checkpoint['target']}")
+
+    builder = CVProcessor(tenant=live.partition, target=checkpoint["target"])
+    done = _read_log(log_path)
+    resumed = bool(done)
+    if resumed:
+        logger.info(f"Skipping {len(done)} files ingested before the rebuild was interrupted")
+
+    # Rebuilds see the whole directory: sharding only applies to in-place ingestion
+    def scan():
+        return builder.scan_directory(directory_path, shard_index=0, shard_count=1)
+
+    total = sum(1 for _ in scan()) if progress_callback else None
+    processed = 0
+    scanned = set()
+    failed = []
+    # Counts are written once per batch of CVs instead of rewriting the aggregates per CV
+    with builder.aggregates.batch(config.AGGREGATES_FLUSH_EVERY), open(log_path, "a", encoding="utf-8") as log:
+        for cv_file in scan():
+            filename = os.path.relpath(cv_file, directory_path).replace(os.sep, "/")
+            scanned.add(filename)
+            if filename not in done:
+                try:
+                    stored = builder.process_file(cv_file, filename, strict=True)
+                except Exception:
+                    # Left out of the log, so resuming the rebuild retries it
+                    failed.append(filename)
+                else:
+                    done[filename] = stored
+                    log.write(f"{filename}\t{stored}\n")
+                    log.flush()
+                    os.fsync(log.fileno())
+            processed += 1
+            if progress_callback:
+                progress_callback(min(float(processed) / max(total, 1), 1.0))
+
+    serving = live.tenant or live.class_name
+    if failed:
+        raise RebuildVerificationError(
+            f"{len(failed)} of {len(scanned)} files could not be indexed into {checkpoint['target']} "
+            f"(first: {failed[0]}); run the rebuild again to retry them. {logical} still serves {serving}"
+        )
+
+    # Every file the scan found has been ingested. A file re-ingested after a
+    # crash replaces its own object, so the index can't hold fewer CVs than logged.
+    expected = sum(done[filename] for filename in scanned)
+    if expected == 0:
+        logger.warning(
+            f"No CVs to index in {directory_path} ({len(scanned)} files found); "
+            f"discarding {checkpoint['target']}, {logical} still serves {serving}"
+        )
+        _drop_target(live.client, checkpoint["target"])
+        _remove_checkpoint(checkpoint_path, log_path)
+        return 0
+
+    # Uploads during the rebuild were ingested into the live index, which is about
+    # to be dropped; the checkpoint keeps started_at, so a failed run retries them
+    caught_up = time.time()
+    try:
+        _catch_up(builder, directory_path, checkpoint["started_at"])
+    except Exception as e:
+        raise RebuildVerificationError(
+            f"Files written during the rebuild could not be indexed into {checkpoint['target']} ({str(e)}); "
+            f"run the rebuild again to retry them. {logical} still serves {serving}"
+        ) from e
+
+    stored = builder.get_cv_count()
+    if stored < expected:
+        raise RebuildVerificationError(
+            f"{checkpoint['target']} holds {stored} CVs but the rebuild stored {expected}; "
+            f"{logical} still serves {serving}"
+        )
+
+    if resumed:
+        # Counts still buffered when the previous run was interrupted were never written
+        recompute_aggregates(builder)
+
+    previous = index_aliases.switch(logical, checkpoint["target"])
+    search_cache.bump_generation()
+    # Files written after the catch-up scan may have gone to the previous index
+    if _catch_up(builder, directory_path, caught_up, strict=False):
+        stored = builder.get_cv_count()
+        search_cache.bump_generation()
+    logger.info(f"{logical} now serves {stored} CVs from {checkpoint['target']}")
+
+    _remove_checkpoint(checkpoint_path, log_path)
+
+    if previous != checkpoint["target"]:
+        # Let reads that resolved the old index before the switch finish
+        time.sleep(config.REBUILD_GC_GRACE)
+        _drop_target(live.client, previous)
+    return stored
+
+
+def rebuild_index(directory_path: str, tenant: str = None, fresh: bool = False,
+                  progress_callback: Callable[[float], None] = None) -> int:
+    """Re-index a directory into a fresh versioned index, then switch readers over to it.
+
+    The live index keeps serving while the new one is built. Progress is
+    checkpointed per file, so a crashed rebuild resumes where it stopped (unless
+    fresh is set) and files that failed are retried by the next run. Readers are
+    only switched once every file the scan found has been ingested and the new
+    index holds every CV the rebuild stored; the old index is dropped afterwards.
+    Files written to the directory while the rebuild runs (live uploads) are
+    ingested into the new index before and right after the switch.
+    Returns the number of CVs now served, or 0 if the directory held none and
+    the current index was kept. Raises RebuildAlreadyRunning if another rebuild
+    of the same index holds its lock.
+    """
+    live = CVProcessor(tenant=tenant)
+    lock_path = f"{_checkpoint_paths(live.logical_name)[0]}.lock"
+    # One rebuild per index at a time: concurrent runs would share the checkpoint and target
+    with open(lock_path, "w") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise RebuildAlreadyRunning(f"A rebuild of {live.logical_name} is already running") from None
+        return _rebuild(live, directory_path, fresh, progress_callback)
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild the CV index without taking it offline")
+    parser.add_argument("directory", nargs="?", help="Directory of CVs to index (default: the requisition's CV directory)")
+    parser.add_argument("--tenant", help="Requisition partition to rebuild")
+    parser.add_argument("--fresh", action="store_true", help="Discard an interrupted rebuild instead of resuming it")
+    args = parser.parse_args(argv)
+    directory = args.directory or CVProcessor(tenant=args.tenant).cv_directory
+    rebuild_index(directory, tenant=args.tenant, fresh=args.fresh)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
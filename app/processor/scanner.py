@@ -0,0 +1,69 @@
+import os
+import zlib
+import logging
+from typing import Iterable, Iterator, Optional
+
+logger = logging.getLogger('CV_Processor')
+
+
+def shard_of(relative_path: str, shard_count: int) -> int:
+    """Return the shard a file belongs to.
+
+    Uses CRC32 of the path relative to the scan root, which (unlike hash()) is
+    stable across processes and hosts, so every node agrees on the split.
+    """
+    return zlib.crc32(relative_path.replace(os.sep, "/").encode("utf-8")) % shard_count
+
+
+def iter_cv_files(
+    root: str,
+    extensions: Iterable[str],
+    min_size: int = 0,
+    max_size: Optional[int] = None,
+    modified_after: Optional[float] = None,
+    shard_index: int = 0,
+    shard_count: int = 1
+) -> Iterator[str]:
+    """Recursively yield matching file paths under root without building a full listing.
+
+    Directories are walked with os.scandir using an explicit stack, so memory stays
+    proportional to the tree depth rather than the number of files. Files are
+    filtered by extension, size and modification time, and only those that hash
+    into shard_index out of shard_count are yielded.
+    """
+    suffixes = tuple(ext.lower() for ext in extensions)
+    needs_stat = min_size > 0 or max_size is not None or modified_after is not None
+    pending = [root]
+
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.name.startswith("."):
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                            continue
+                        if not entry.is_file() or not entry.name.lower().endswith(suffixes):
+                            continue
+
+                        relative_path = os.path.relpath(entry.path, root)
+                        if shard_count > 1 and shard_of(relative_path, shard_count) != shard_index:
+                            continue
+
+                        if needs_stat:
+                            stat = entry.stat()
+                            if stat.st_size < min_size:
+                                continue
+                            if max_size is not None and stat.st_size > max_size:
+                                continue
+                            if modified_after is not None and stat.st_mtime <= modified_after:
+                                continue
+
+                        yield entry.path
+                    except OSError as e:
+                        logger.warning(f"Skipping {entry.path}: {str(e)}")
+        except OSError as e:
+            logger.warning(f"Cannot scan {directory}: {str(e)}")
@@ -0,0 +1,209 @@
+import os
+import sys
+import time
+import logging
+import argparse
+from itertools import islice
+from typing import Iterator, List
+
+import numpy as np
+import pyarrow as pa
+
+import config
+from processor.aggregates import recompute_aggregates
+from processor.cache import search_cache
+from processor.processor import CVProcessor
+
+logger = logging.getLogger('CV_Processor')
+
+SNAPSHOT_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("filename", pa.string()),
+    ("skills", pa.list_(pa.string())),
+    ("content", pa.large_string()),
+    ("duplicateOf", pa.string()),
+    ("vector", pa.list_(pa.float32())),
+    ("minhash", pa.binary()),
+    ("canonicalId", pa.string()),
+    ("ingestedAt", pa.string())
+])
+
+
+def _iter_pages(processor: CVProcessor, page_size: int) -> Iterator[List[dict]]:
+    """Stream every CV object with its vector, one cursor page at a time"""
+    objects = processor.iter_objects(
+        ["filename", "skills", "content", "duplicateOf", "ingestedAt"], ["vector"], page_size
+    )
+    while True:
+        page = list(islice(objects, page_size))
+        if not page:
+            return
+        yield page
+
+
+def export_snapshot(processor: CVProcessor, path: str, page_size: int = None) -> int:
+    """Write every CV in the processor's partition to a zstd-compressed Arrow IPC file.
+
+    Objects are streamed page by page, so memory stays bounded by one page. The file
+    is written under a temporary name and renamed once complete.
+    """
+    page_size = page_size or config.SNAPSHOT_PAGE_SIZE
+    metadata = {
+        "class": processor.class_name,
+        "tenant": processor.tenant or "",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    }
+    tmp_path = f"{path}.tmp"
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    exported = 0
+    started = time.monotonic()
+
+    with pa.OSFile(tmp_path, "wb") as sink:
+        options = pa.ipc.IpcWriteOptions(compression="zstd")
+        with pa.ipc.new_file(sink, SNAPSHOT_SCHEMA.with_metadata(metadata), options=options) as writer:
+            for page in _iter_pages(processor, page_size):
+                columns = {name: [] for name in SNAPSHOT_SCHEMA.names}
+                for obj in page:
+                    doc_id = obj['_additional']['id']
+                    # Carry the near-duplicate signature along so restore doesn't have to recompute it
+                    entry = processor.dedup.get(doc_id) if processor.dedup else None
+                    columns["id"].append(doc_id)
+                    columns["filename"].append(obj.get('filename'))
+                    columns["skills"].append(obj.get('skills') or [])
+                    columns["content"].append(obj.get('content'))
+                    columns["duplicateOf"].append(obj.get('duplicateOf'))
+                    columns["vector"].append(obj['_additional'].get('vector'))
+                    columns["minhash"].append(entry[1].tobytes() if entry else None)
+                    columns["canonicalId"].append(entry[0] if entry else None)
+                    columns["ingestedAt"].append(obj.get('ingestedAt'))
+                writer.write_batch(pa.RecordBatch.from_pydict(columns, schema=SNAPSHOT_SCHEMA))
+                exported += len(page)
+                logger.info(f"Exported {exported} CVs")
+
+    os.replace(tmp_path, path)
+    logger.info(f"Wrote snapshot of {exported} CVs to {path} in {time.monotonic() - started:.1f}s")
+    return exported
+
+
+class SnapshotRestoreError(RuntimeError):
+    """Some snapshot objects were rejected by Weaviate"""
+
+
+def restore_snapshot(processor: CVProcessor, path: str, clear: bool = False) -> int:
+    """Bulk-load a snapshot into the processor's partition with batched imports.
+
+    Vectors are supplied with every object, so nothing is re-vectorized and the
+    restore is bound by I/O. Object IDs are preserved, so restoring over existing
+    data replaces those objects instead of duplicating them. Raises
+    SnapshotRestoreError if Weaviate rejected any object.
+    """
+    if clear:
+        processor.clear_database()
+
+    class_name, tenant, dedup = processor.class_name, processor.tenant, processor.dedup
+    # Every queued object waits here, with its near-duplicate entry (if any),
+    # until Weaviate confirms it was imported
+    pending = {}
+    errors = []
+    queued = 0
+    imported = 0
+
+    def on_batch(results):
+        nonlocal imported
+        for result in results or []:
+            entry = pending.pop(result.get('id'), None)
+            object_errors = ((result.get('result') or {}).get('errors') or {}).get('error')
+            if object_errors:
+                errors.append(f"{result.get('id')}: {object_errors[0].get('message')}")
+                continue
+            imported += 1
+            if entry:
+                dedup.add(result['id'], *entry)
+
+    client = processor.client
+    client.batch.configure(
+        batch_size=config.SNAPSHOT_BATCH_SIZE,
+        num_workers=config.SNAPSHOT_IMPORT_WORKERS,
+        dynamic=False,
+        callback=on_batch
+    )
+    started = time.monotonic()
+
+    with pa.memory_map(path, "r") as source:
+        reader = pa.ipc.open_file(source)
+        logger.info(f"Restoring snapshot {path} ({reader.schema.metadata})")
+        with client.batch as batch:
+            for i in range(reader.num_record_batches):
+                for row in reader.get_batch(i).to_pylist():
+                    properties = {
+                        "filename": row["filename"],
+                        "skills": row["skills"],
+                        "content": row["content"]
+                    }
+                    if row["duplicateOf"]:
+                        properties["duplicateOf"] = row["duplicateOf"]
+                    # Snapshots taken before ingest dates were recorded don't have the column
+                    if row.get("ingestedAt"):
+                        properties["ingestedAt"] = row["ingestedAt"]
+                    pending[row["id"]] = None
+                    if dedup and row["minhash"]:
+                        pending[row["id"]] = (
+                            row["filename"],
+                            np.frombuffer(row["minhash"], dtype=np.uint32),
+                            row["canonicalId"]
+                        )
+                    batch.add_data_object(
+                        properties,
+                        class_name,
+                        uuid=row["id"],
+                        vector=row["vector"],
+                        tenant=tenant
+                    )
+                    queued += 1
+                logger.info(f"Queued {queued} CVs for import")
+
+    # The client re-sends a batch whose response timed out and only keeps the objects
+    # missing from Weaviate, without reporting the rest; look those up directly
+    if pending:
+        logger.info(f"Checking {len(pending)} CVs the batch import did not report")
+    for doc_id, entry in pending.items():
+        if client.data_object.exists(doc_id, class_name=class_name, tenant=tenant):
+            imported += 1
+            if entry:
+                dedup.add(doc_id, *entry)
+
+    # Restored objects may replace existing ones, so recount rather than add
+    recompute_aggregates(processor)
+    search_cache.bump_generation()
+    if errors or imported != queued:
+        raise SnapshotRestoreError(
+            f"Imported {imported} of {queued} CVs from {path}; "
+            f"{len(errors)} rejected, e.g. {'; '.join(errors[:3])}"
+        )
+    logger.info(f"Restored {imported} CVs from {path} in {time.monotonic() - started:.1f}s")
+    return imported
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export or restore a snapshot of the CV index")
+    parser.add_argument("command", choices=["export", "restore"])
+    parser.add_argument("path", nargs="?", help="Snapshot file (default: a timestamped file in SNAPSHOT_DIR)")
+    parser.add_argument("--tenant", help="Requisition partition to export or restore into")
+    parser.add_argument("--clear", action="store_true", help="Clear the partition before restoring")
+    args = parser.parse_args(argv)
+
+    processor = CVProcessor(tenant=args.tenant)
+    if args.command == "export":
+        path = args.path or os.path.join(
+            config.SNAPSHOT_DIR,
+            f"cv_{processor.tenant or 'default'}_{time.strftime('%Y%m%d%H%M%S')}.arrow"
+        )
+        export_snapshot(processor, path)
+    else:
+        if not args.path:
+            parser.error("restore needs the snapshot path")
+        restore_snapshot(processor, args.path, clear=args.clear)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
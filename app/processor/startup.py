@@ -0,0 +1,111 @@
+import time
+import random
+import logging
+import threading
+from typing import Dict
+
+import requests
+
+import config
+
+logger = logging.getLogger('CV_Processor')
+
+# Seconds each startup stage took in this process, e.g. {"weaviate_ready": 3.2, "warm_up:CV": 0.4}
+_timings: Dict[str, float] = {}
+_done = set()
+_lock = threading.Lock()
+
+
+class DependencyNotReady(RuntimeError):
+    """A service the application depends on did not become ready within the startup period"""
+
+
+def get_startup_timings() -> Dict[str, float]:
+    """Return how long each startup stage took in this process"""
+    with _lock:
+        return dict(_timings)
+
+
+def record_timing(stage: str, seconds: float) -> None:
+    with _lock:
+        _timings[stage] = round(seconds, 3)
+    logger.info(f"Startup: {stage} took {seconds:.2f}s")
+
+
+def wait_for_http(name: str, url: str, timeout: float = None) -> None:
+    """Poll a readiness endpoint until it answers 2xx, backing off exponentially with jitter.
+
+    Each URL is only probed once per process. Raises DependencyNotReady when the
+    service isn't ready within timeout seconds (WEAVIATE_STARTUP_PERIOD by default).
+    """
+    if url in _done:
+        return
+    timeout = config.WEAVIATE_STARTUP_PERIOD if timeout is None else timeout
+    started = time.monotonic()
+    delay = config.STARTUP_BACKOFF_INITIAL
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            response = requests.get(url, timeout=config.WEAVIATE_CONNECT_TIMEOUT)
+            if 200 <= response.status_code < 300:
+                break
+            error = f"HTTP {response.status_code}"
+        except requests.RequestException as e:
+            error = str(e)
+
+        elapsed = time.monotonic() - started
+        if elapsed >= timeout:
+            raise DependencyNotReady(f"{name} at {url} not ready after {elapsed:.1f}s and {attempts} attempts: {error}")
+        # Half fixed, half random: several containers starting together don't probe in lockstep
+        pause = min(delay / 2 + random.uniform(0, delay / 2), timeout - elapsed)
+        logger.info(f"Waiting for {name} ({error}), retrying in {pause:.2f}s")
+        time.sleep(pause)
+        delay = min(delay * 2, config.STARTUP_BACKOFF_MAX)
+
+    with _lock:
+        _done.add(url)
+    record_timing(f"{name}_ready", time.monotonic() - started)
+
+
+def wait_for_dependencies(weaviate_url: str) -> None:
+    """Block until Weaviate, and the transformer service when configured, accept requests"""
+    if config.TRANSFORMERS_INFERENCE_API:
+        wait_for_http("transformer", config.TRANSFORMERS_INFERENCE_API.rstrip("/") + "/.well-known/ready")
+    wait_for_http("weaviate", weaviate_url.rstrip("/") + "/v1/.well-known/ready")
+
+
+def once(key: tuple) -> bool:
+    """Return True the first time a startup step is claimed for key in this process"""
+    with _lock:
+        if key in _done:
+            return False
+        _done.add(key)
+        return True
+
+
+def forget(key: tuple) -> None:
+    """Let a startup step run again, e.g. after it failed"""
+    with _lock:
+        _done.discard(key)
+
+
+def warm_up(processor) -> None:
+    """Vectorize a throwaway query so the model is loaded before the first real ingest or search"""
+    if not config.STARTUP_WARM_UP or not once(("warm_up", processor.class_name)):
+        return
+    started = time.monotonic()
+    try:
+        results = (
+            processor.query_get(["filename"])
+            .with_near_text({"concepts": ["software engineer"]})
+            .with_limit(1)
+            .do()
+        )
+        if 'errors' in results:
+            raise RuntimeError(results['errors'])
+        record_timing(f"warm_up:{processor.class_name}", time.monotonic() - started)
+    except Exception as e:
+        # Only a latency optimisation: the first real request pays the model load instead
+        forget(("warm_up", processor.class_name))
+        logger.warning(f"Warm-up query failed: {str(e)}")